@@ -1,5 +1,6 @@
 """Flask application factory."""
 import os
+import threading
 from logging.config import dictConfig
 import yaml
 from flask import Flask
@@ -12,34 +13,69 @@ from flask_apscheduler import APScheduler
 db = SQLAlchemy()
 login_manager = LoginManager()
 scheduler = APScheduler()
-events = {}
+actuators = {}
+hardware_ready = threading.Event()
 
 
-def create_app():
-    """Creates and returns the flask application."""
+def create_app(daemon=False):
+    """Creates and returns the flask application.
+
+    By default the application runs the scheduler and hardware itself. When a
+    daemon socket is configured web workers leave these to the daemon, which is
+    created by passing daemon as true, and send it calls over the socket instead.
+    Hardware and scheduler jobs are initialised in the background, modules with
+    heavy imports are only imported when first used.
+    """
+    from app.core.startup import StartupTimer
+    timer = StartupTimer()
+
     # Sets up the logging config before creating the application object.
     basedir = os.path.abspath(os.path.dirname(__file__))
     path = os.path.join(basedir, "core", "logging.yaml")
     with open(path, "rt") as f:
         logging_config = yaml.safe_load(f.read())
     dictConfig(logging_config)
+    timer.mark("logging")
 
     # Creates the flask application object and loads config.
     app = Flask(__name__)
     from app.core.config import Config
     app.config.from_object(Config)
+    app.config["DAEMON"] = daemon
+    from app.core.ipc import is_client
+    client = is_client(app.config)
+    if app.config["DAEMON_SOCKET"] and "SECRET_KEY" not in os.environ:
+        raise RuntimeError("SECRET_KEY must be set in the environment when using the daemon")
+    timer.mark("config")
 
-    # Initialises and creates all databases.
+    # Initialises, creates, and upgrades all databases.
     db.init_app(app)
+    from app.core.storage import init_storage
+    init_storage(app)
+    from app.core.metrics import init_metrics
+    init_metrics(app)
+    from app.core.profiling import init_profiling
+    init_profiling(app)
     from app.auth.models import User
     from app.weather.models import Daily, Hourly
-    from app.water.models import System, Plant, History, Config
+    from app.water.models import System, Plant, History, Config, Usage
+    from app.weather.setup import remove_duplicate_days, remove_duplicate_hours
+    from app.water.setup import upgrade_configs
+    from app.core.setup import init_indexes
     with app.app_context():
         db.create_all()
+        remove_duplicate_days()
+        remove_duplicate_hours()
+        upgrade_configs()
+        init_indexes()
+    timer.mark("databases")
 
-    # Initialises the scheduler.
+    # Initialises the scheduler, paused until systems are initialised so persisted
+    # jobs that are due do not run before their actuators exist.
     scheduler.init_app(app)
-    scheduler.start()
+    if not client:
+        scheduler.start(paused=True)
+    timer.mark("scheduler")
 
     # Core module setup.
     from app.core import core_bp
@@ -58,9 +94,11 @@ def create_app():
     login_manager.login_message_category = "info"
     login_manager.init_app(app)
 
+    from app.auth.cache import user_cache
+
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        return user_cache.get(int(id), app.config)
 
     from app.auth.setup import init_accounts
     with app.app_context():
@@ -76,10 +114,50 @@ def create_app():
     # Water module setup.
     from app.water import water_bp
     app.register_blueprint(water_bp, url_prefix="/water")
-    from app.water.setup import init_systems, init_plants
-    with app.app_context():
-        init_systems()
-        init_plants()
+    from app.water import commands as water_cmds
+    app.cli.add_command(water_cmds.rebuild_usage)
+    timer.mark("modules")
+
+    # Initialises hardware and jobs off the request serving path.
+    if not client:
+        init_background(app)
+    app.extensions["startup_timer"] = timer
+    app.logger.info(f"Startup: {timer.report()}")
 
     # Returns the flask application object.
     return app
+
+
+def init_background(app):
+    """Initialises hardware and scheduler jobs on a background thread.
+
+    Turning systems off can take several seconds so this is kept off the request
+    serving path, hardware_ready is set once every system is off and registered.
+    The scheduler is resumed once jobs are initialised, even if this fails, so
+    weather jobs still run.
+    """
+    def run():
+        from app.core.startup import StartupTimer
+        from app.water.gpio import init_gpio
+        from app.water.setup import init_systems, init_plants, init_jobs as init_water_jobs
+        from app.weather.setup import init_jobs as init_weather_jobs
+        timer = StartupTimer()
+        with app.app_context():
+            try:
+                init_gpio(app.config)
+                init_systems()
+                hardware_ready.set()
+                timer.mark("hardware")
+                init_plants()
+                init_water_jobs()
+                init_weather_jobs()
+                timer.mark("jobs")
+            except Exception:
+                app.logger.exception("Background startup failed")
+                return
+            finally:
+                scheduler.resume()
+        app.extensions["background_startup_timer"] = timer
+        app.logger.info(f"Background startup: {timer.report()}")
+    threading.Thread(target=run, name="startup", daemon=True).start()
+    return
@@ -3,6 +3,7 @@ from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.auth.models import User
 from app.auth.forms import LoginForm, AdminForm
+from app.auth.cache import user_cache
 from app.auth import auth_bp
 from app import db
 
@@ -51,6 +52,7 @@ def admin():
         user.username = admin_form.username.data
         user.password = generate_password_hash(admin_form.password.data)
         db.session.commit()
+        user_cache.invalidate(current_app.config)
         flash("User Details Updated", category="success")
         return redirect(url_for("auth_bp.admin"))
     return render_template("auth/admin.html",
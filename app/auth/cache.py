@@ -0,0 +1,56 @@
+"""Cache of users loaded by Flask-Login on each authenticated request."""
+import time
+from flask_login import UserMixin
+from app.core.stamp import StampCache, get_stamp
+from app.auth.models import User
+from app import db
+
+
+class CachedUser(UserMixin):
+    """Plain copy of a user that is safe to share between requests and threads.
+
+    Holds only the columns read by routes and templates, the password hash is
+    never cached.
+    """
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f"<CachedUser: {self.username}>"
+
+
+class UserCache(StampCache):
+    """Holds users by id for ttl seconds so requests skip the users database.
+
+    Invalidating the cache touches the USER_CACHE_STAMP file, so changes made
+    by other processes such as web workers or click commands clear the cache
+    in every process.
+    """
+
+    def get(self, user_id, config):
+        """Returns the cached user for the given id, loading it if missing or expired.
+
+        Args:
+            user_id: Unique id given to a user.
+            config: The applications config.
+
+        Returns:
+            A CachedUser or none if the user does not exist.
+        """
+        now = time.monotonic()
+
+        def load():
+            row = db.session.execute(db.select(User.id, User.username).where(User.id == user_id)).first()
+            return now + config["USER_CACHE_TTL"], CachedUser(*row) if row else None
+
+        generation = self.check(get_stamp(config["USER_CACHE_STAMP"]))
+        return self.get_or_load(generation, user_id, load, lambda entry: entry[0] > now)[1]
+
+    def invalidate(self, config):
+        """Clears the cache in this and every other process."""
+        self.touch(config["USER_CACHE_STAMP"])
+
+
+user_cache = UserCache()
@@ -1,8 +1,10 @@
 """Click commands used by flask application."""
 import click
+from flask import current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 from app.auth.models import User
+from app.auth.cache import user_cache
 
 
 @click.command()
@@ -17,6 +19,7 @@ def create_user(username, password):
         user = User(username=username, password=generate_password_hash(password))
         db.session.add(user)
         db.session.commit()
+        user_cache.invalidate(current_app.config)
 
 
 @click.command()
@@ -28,5 +31,6 @@ def drop_user(username, password):
     if user and check_password_hash(user.password, password):
         db.session.delete(user)
         db.session.commit()
+        user_cache.invalidate(current_app.config)
     else:
         print("Error")
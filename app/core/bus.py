@@ -0,0 +1,57 @@
+"""In process publish and subscribe bus used to push events to connected clients."""
+import threading
+from collections import deque
+
+
+class Subscription(object):
+    """Buffers events for a single subscriber.
+
+    At most maxlen events are buffered, when a subscriber falls behind the
+    oldest events are dropped and counted so memory stays bounded.
+    """
+
+    def __init__(self, maxlen):
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.changed = threading.Condition()
+
+    def put(self, event):
+        with self.changed:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self.changed.notify()
+
+    def get(self, timeout):
+        """Waits up to timeout seconds and returns a list of all buffered events."""
+        with self.changed:
+            if not self.events:
+                self.changed.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+
+class Bus(object):
+    """Delivers each published event to every current subscription."""
+
+    def __init__(self, maxlen=100):
+        self.maxlen = maxlen
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def subscribe(self):
+        subscription = Subscription(self.maxlen)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
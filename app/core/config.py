@@ -5,17 +5,86 @@ basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 
 class Config(object):
-    SECRET_KEY = os.urandom(12).hex()
+    # Must be set in the environment when using the daemon so all processes share it.
+    SECRET_KEY = os.environ.get("SECRET_KEY") or os.urandom(12).hex()
+    # Path to the daemons Unix socket, when set web workers do not run the scheduler or hardware.
+    DAEMON_SOCKET = os.environ.get("DAEMON_SOCKET")
+    DAEMON_TIMEOUT = 10
+    DAEMON = False
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(basedir, "core", "default.db")
     SQLALCHEMY_BINDS = {
         "users": "sqlite:///" + os.path.join(basedir, "auth", "users.db"),
         "weather": "sqlite:///" + os.path.join(basedir, "weather", "weather.db"),
         "water": "sqlite:///" + os.path.join(basedir, "water", "water.db")
     }
+    # Each bind has its own pool shared by request, scheduler, and actuator threads.
+    # Pools are sized for the scheduler's workers plus the web server's threads.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 30
+    }
+    # Users are cached by each process, the stamp file is touched to clear every cache.
+    USER_CACHE_TTL = 300
+    USER_CACHE_STAMP = os.path.join(basedir, "auth", "users.stamp")
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -8000,
+        "mmap_size": 67108864
+    }
+    SQLITE_BIND_PRAGMAS = {
+        "users": {"mmap_size": 0, "cache_size": -2000}
+    }
     SCHEDULER_API_ENABLED = True
+    # Jobs persist between restarts, misfired runs are handled by the policy for their job type.
+    SCHEDULER_JOBSTORES = {"default": {"type": "sqlalchemy", "url": SQLALCHEMY_DATABASE_URI}}
+    SCHEDULER_JOB_DEFAULTS = {"coalesce": True, "max_instances": 1}
+    SCHEDULER_MISFIRE_POLICIES = {
+        "dispatch": {"coalesce": True, "misfire_grace_time": None},
+        "get_weather": {"coalesce": True, "misfire_grace_time": None},
+        "archive_history": {"coalesce": True, "misfire_grace_time": None}
+    }
+    SCHEDULER_EXECUTORS = {"default": {"type": "threadpool", "max_workers": 10}}
     URL = "https://api.open-meteo.com/v1/forecast"
+    OPENMETEO_CACHE_DIR = os.path.join(basedir, "weather", "cache")
+    OPENMETEO_CACHE_TTL = 900
+    OPENMETEO_TIMEOUT = 10
+    OPENMETEO_RETRIES = 3
+    OPENMETEO_FAILURE_THRESHOLD = 5
+    OPENMETEO_COOLDOWN = 60
     CITY = "Cardiff"
     REGION = "Wales"
     LATITUDE = 51.48
     LONGITUDE = -3.18
     TIMEZONE = "Europe/London"
+    SERIES_MAX_POINTS = 1000
+    # Touched whenever weather data changes to clear the chart cache of every process.
+    CHART_CACHE_STAMP = os.path.join(basedir, "weather", "charts.stamp")
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS", "") == "1"
+    PROFILE_REPORT_SIZE = 100
+    PROFILE_REPEAT_THRESHOLD = 3
+    WATER_CONCURRENCY_LIMIT = 4
+    WATER_MISSED_GRACE_SEC = 3600
+    WATER_ET_REFERENCE_MM_DAY = 3
+    WATER_ET_EFFECTIVE_RAIN = 0.8
+    WATER_ET_MAX_FACTOR = 2
+    WATER_EVENTS_BUFFER = 100
+    WATER_EVENTS_KEEPALIVE_SEC = 5
+    WATER_EVENTS_MAX_SEC = 300
+    WATER_DEFAULT_SUPPLY = "main"
+    WATER_SYSTEM_SUPPLY = {"ValvePump": ("main", 1)}
+    WATER_SUPPLY_CAPACITY = {"main": 1}
+    WATER_PUMP_HOLD_SEC = 10
+    # Touched whenever plants change to clear the navigation cache of every process.
+    WATER_NAVIGATION_STAMP = os.path.join(basedir, "water", "navigation.stamp")
+    HARDWARE_READY_TIMEOUT = 60
+    HISTORY_ARCHIVE_DIR = os.path.join(basedir, "water", "archive")
+    HISTORY_ARCHIVE_AGE_DAYS = 90
+    GPIO_BACKEND = os.environ.get("GPIO_BACKEND", "rpi")
+    GPIO_RELAY_DELAY_SEC = 0.01
+    GPIO_BOUNCE_PATTERN = "000010101101111"
+    GPIO_BOUNCE_INTERVAL_SEC = 0.005
+    GPIO_WIRING = {18: 12}
@@ -1,9 +1,18 @@
 """Core routes and scheduler callbacks."""
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_ADDED, EVENT_JOB_REMOVED
-from flask import redirect, url_for
+import hmac
+import time
+from datetime import datetime, timezone
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_ADDED, EVENT_JOB_REMOVED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+from flask import redirect, url_for, current_app, jsonify, request, abort
+from flask_login import login_required, current_user
+from app.core.ipc import is_client, IPCError
+from app.core.metrics import snapshot, get_snapshot, render, job_lag, job_runtime
+from app.core.profiling import get_report
 from app import scheduler
 from app.core import core_bp
 
+job_starts = {}
+
 
 @core_bp.route("/", methods=["GET"])
 def core_index():
@@ -11,6 +20,37 @@ def core_index():
     return redirect(url_for("auth_bp.login"))
 
 
+@core_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Returns metrics in the Prometheus text format.
+
+    Metrics held by the daemon are included when one is used. When METRICS_TOKEN
+    is set scrapers must send it as a bearer token, otherwise a login is required.
+    """
+    token = current_app.config["METRICS_TOKEN"]
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+    elif not current_user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+    if is_client(current_app.config):
+        snapshots = {"web": snapshot()}
+        try:
+            snapshots["daemon"] = get_snapshot()
+        except IPCError:
+            current_app.logger.warning("Unable to retrieve metrics from daemon")
+    else:
+        snapshots = {"app": snapshot()}
+    return render(snapshots), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
+@core_bp.route("/profile", methods=["GET"])
+@login_required
+def profile():
+    """Returns the rolling report of profiled requests."""
+    return jsonify(get_report())
+
+
 def job_added(event):
     """Job added callback."""
     with scheduler.app.app_context():
@@ -24,19 +64,44 @@ def job_removed(event):
         scheduler.app.logger.debug(f"Removed job '{event.job_id}'")
 
 
+def job_submitted(event):
+    """Job submitted callback, records the lag behind the scheduled run time."""
+    now = datetime.now(timezone.utc)
+    for run_time in event.scheduled_run_times:
+        job_lag.observe(max((now - run_time).total_seconds(), 0), job=event.job_id)
+        job_starts[(event.job_id, run_time)] = time.perf_counter()
+
+
+def record_runtime(event, outcome):
+    start = job_starts.pop((event.job_id, event.scheduled_run_time), None)
+    if start is not None:
+        job_runtime.observe(time.perf_counter() - start, job=event.job_id, outcome=outcome)
+
+
 def job_executed(event):
     """Job executed callback."""
+    record_runtime(event, "success")
     with scheduler.app.app_context():
         scheduler.app.logger.debug(f"Executed job '{event.job_id}'")
 
 
 def job_error(event):
     """Job error callback."""
+    record_runtime(event, "error")
     with scheduler.app.app_context():
         scheduler.app.logger.debug(f"Error with job '{event.job_id}'")
 
 
+def job_missed(event):
+    """Job missed callback, discards the start recorded when the run was submitted."""
+    job_starts.pop((event.job_id, event.scheduled_run_time), None)
+    with scheduler.app.app_context():
+        scheduler.app.logger.debug(f"Missed job '{event.job_id}' scheduled for {event.scheduled_run_time}")
+
+
 scheduler.add_listener(job_added, EVENT_JOB_ADDED)
 scheduler.add_listener(job_removed, EVENT_JOB_REMOVED)
+scheduler.add_listener(job_submitted, EVENT_JOB_SUBMITTED)
 scheduler.add_listener(job_executed, EVENT_JOB_EXECUTED)
 scheduler.add_listener(job_error, EVENT_JOB_ERROR)
+scheduler.add_listener(job_missed, EVENT_JOB_MISSED)
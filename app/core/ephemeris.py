@@ -0,0 +1,48 @@
+"""Precomputed sunrise and sunset times shared by the water and weather modules."""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import pytz
+from astral import LocationInfo
+from astral.sun import sun
+
+
+def get_location(config):
+    """Returns the location specified within the applications config as a hashable tuple."""
+    return (config["CITY"],
+            config["REGION"],
+            config["TIMEZONE"],
+            config["LATITUDE"],
+            config["LONGITUDE"])
+
+
+@lru_cache(maxsize=4)
+def get_table(location, year):
+    """Calculates sunrise and sunset times for every date in the given year.
+
+    Tables are cached per location and year so each is only calculated once,
+    the cache is bounded as only the current and following year are needed.
+
+    Args:
+        location: Tuple of city, region, timezone, latitude, and longitude.
+        year: Integer of the year to calculate.
+
+    Returns:
+        A dictionary of dates mapped to tuples of sunrise and sunset times.
+    """
+    city = LocationInfo(*location)
+    tz = pytz.timezone(location[2])
+    table = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        s = sun(city.observer, tzinfo=tz, date=day)
+        table[day] = (s["sunrise"].time().replace(microsecond=0),
+                      s["sunset"].time().replace(microsecond=0))
+        day += timedelta(days=1)
+    return table
+
+
+def get_suntimes(day, config):
+    """Retrieves sunrise and sunset times for the given date from the precomputed tables."""
+    if isinstance(day, datetime):
+        day = day.date()
+    return get_table(get_location(config), day.year)[day]
@@ -0,0 +1,165 @@
+"""Local IPC channel between web workers and the scheduler daemon.
+
+Functions decorated with remote run locally when the application owns the
+scheduler and hardware, otherwise the call is sent over a Unix socket to the
+daemon which runs it instead. Messages are single lines of json and must carry
+the applications secret key. Functions decorated with remote_stream are
+generators, the daemon writes a line for each item until either side closes.
+"""
+import os
+import inspect
+import hmac
+import json
+import socket
+import socketserver
+from functools import wraps
+from flask import current_app
+
+handlers = {}
+
+
+class IPCError(Exception):
+    """Raised when a call to the daemon fails."""
+
+
+def is_client(config):
+    """Returns true if calls should be sent to the daemon."""
+    return bool(config["DAEMON_SOCKET"]) and not config["DAEMON"]
+
+
+def remote(function):
+    """Registers a function with the daemon and forwards calls to it when running as a client.
+
+    Decorated functions must be called with keyword arguments that are json
+    serialisable, as must their return values.
+    """
+    handlers[function.__name__] = function
+
+    @wraps(function)
+    def wrapper(**kwargs):
+        if is_client(current_app.config):
+            return call(function.__name__, **kwargs)
+        return function(**kwargs)
+    return wrapper
+
+
+def remote_stream(function):
+    """Registers a generator function with the daemon and streams its items when running as a client.
+
+    Decorated functions must be called with keyword arguments that are json
+    serialisable, as must the items they yield.
+    """
+    handlers[function.__name__] = function
+
+    @wraps(function)
+    def wrapper(**kwargs):
+        if is_client(current_app.config):
+            return stream(function.__name__, **kwargs)
+        return function(**kwargs)
+    return wrapper
+
+
+def connect(config, name, kwargs):
+    """Opens a connection to the daemon and sends a call."""
+    message = json.dumps({"secret": config["SECRET_KEY"], "name": name, "kwargs": kwargs})
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.settimeout(config["DAEMON_TIMEOUT"])
+        connection.connect(config["DAEMON_SOCKET"])
+        connection.sendall(message.encode() + b"\n")
+    except OSError:
+        connection.close()
+        raise
+    return connection
+
+
+def stream(name, **kwargs):
+    """Sends a call to the daemon and returns a generator of the items it streams back.
+
+    The connection is opened immediately so the generator can be consumed outside
+    of the application context. Items must arrive within DAEMON_TIMEOUT seconds
+    of each other so streamed functions should yield keepalive items.
+    """
+    try:
+        connection = connect(current_app.config, name, kwargs)
+    except OSError as e:
+        raise IPCError(f"Stream '{name}' from daemon failed") from e
+
+    def items():
+        with connection, connection.makefile("rb") as file:
+            while True:
+                try:
+                    line = file.readline()
+                    if not line:
+                        return
+                    response = json.loads(line)
+                except (OSError, ValueError) as e:
+                    raise IPCError(f"Stream '{name}' from daemon failed") from e
+                if "error" in response:
+                    raise IPCError(response["error"])
+                yield response["result"]
+    return items()
+
+
+def call(name, **kwargs):
+    """Sends a call to the daemon and returns its result."""
+    try:
+        with connect(current_app.config, name, kwargs) as connection:
+            with connection.makefile("rb") as file:
+                response = json.loads(file.readline())
+    except (OSError, ValueError) as e:
+        raise IPCError(f"Call '{name}' to daemon failed") from e
+    if "error" in response:
+        raise IPCError(response["error"])
+    return response["result"]
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Handles a single call from a web worker."""
+
+    def handle(self):
+        app = self.server.app
+        try:
+            message = json.loads(self.rfile.readline())
+            if not hmac.compare_digest(str(message.get("secret")), app.config["SECRET_KEY"]):
+                response = {"error": "Invalid secret"}
+            elif message.get("name") not in handlers:
+                response = {"error": f"Unknown call '{message.get('name')}'"}
+            elif inspect.isgeneratorfunction(handlers[message["name"]]):
+                with app.app_context():
+                    self.stream(handlers[message["name"]](**message.get("kwargs", {})))
+                return
+            else:
+                with app.app_context():
+                    response = {"result": handlers[message["name"]](**message.get("kwargs", {}))}
+        except Exception as e:
+            app.logger.exception("Daemon call failed")
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+    def stream(self, items):
+        """Writes each item as it is yielded until the web worker disconnects."""
+        try:
+            for item in items:
+                self.wfile.write(json.dumps({"result": item}).encode() + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            items.close()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(app):
+    """Serves calls from web workers until interrupted, run this within the daemon."""
+    path = app.config["DAEMON_SOCKET"]
+    if os.path.exists(path):
+        os.remove(path)
+    with Server(path, Handler) as server:
+        os.chmod(path, 0o600)
+        server.app = app
+        app.logger.info(f"Daemon listening on '{path}'")
+        server.serve_forever()
@@ -0,0 +1,96 @@
+"""Handlers and filters used by the logging config in logging.yaml."""
+import os
+import gzip
+import time
+import shutil
+import queue
+import threading
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class ListenerQueueHandler(QueueHandler):
+    """Queue handler that starts a listener passing records to the given handlers.
+
+    Logging threads only put records on the queue, the handlers are called on
+    the listeners thread so slow writes never block callers. When the queue is
+    full records are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        # Indexing resolves the cfg:// references passed by dictConfig to handler objects.
+        handlers = [handlers[index] for index in range(len(handlers))]
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Stops the listener once queued records are handled, called by logging on shutdown."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that compresses rotated files with gzip.
+
+    Rotation is not safe across processes, so {role} in the filename is replaced
+    with the LOG_ROLE environment variable giving each web worker and the daemon
+    its own file. Roles are reused by replacement processes so the number of files
+    stays fixed, processes without a role share "app".
+    """
+
+    def __init__(self, filename, **kwargs):
+        filename = filename.format(role=os.environ.get("LOG_ROLE", "app"))
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, **kwargs)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = compress
+
+
+def compress(source, dest):
+    """Compresses the rotated log file into dest and removes the original."""
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limits how often records from the same line of code are logged.
+
+    At most burst records from each line are passed within interval seconds,
+    the number suppressed is added to the next record passed from that line.
+    """
+
+    def __init__(self, burst=5, interval=60):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.windows = {}
+
+    def filter(self, record):
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
@@ -0,0 +1,198 @@
+"""In process metrics exposed in the Prometheus text format.
+
+Metrics are held by the process that records them. When a daemon is used
+the scheduler, actuator, and ingestion metrics are held by the daemon and
+are fetched over the IPC channel when rendered by a web worker.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.ipc import remote
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+registry = {}
+
+
+class Metric(object):
+    """Holds a value for each combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+        registry[name] = self
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self):
+        """Returns a list of sample name, labels, and value lists."""
+        with self.lock:
+            return [[self.name, dict(zip(self.labels, key)), value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+    """Value that only increases."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can increase and decrease."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Counts observations within buckets along with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.setdefault(key, [[0] * len(self.buckets), 0, 0])
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the seconds taken by the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append([f"{self.name}_bucket", {**labels, "le": str(bound)}, cumulative])
+                samples.append([f"{self.name}_bucket", {**labels, "le": "+Inf"}, count])
+                samples.append([f"{self.name}_sum", labels, total])
+                samples.append([f"{self.name}_count", labels, count])
+        return samples
+
+
+job_lag = Histogram("scheduler_job_lag_seconds",
+                    "Delay between the scheduled and actual start of jobs",
+                    ["job"])
+job_runtime = Histogram("scheduler_job_runtime_seconds",
+                        "Time taken by jobs from submission to completion",
+                        ["job", "outcome"])
+actuation = Histogram("water_actuation_seconds",
+                      "Time taken to switch systems on or off",
+                      ["system", "action"])
+runs_in_flight = Gauge("water_runs_in_flight",
+                       "Watering runs queued or executing")
+openmeteo_fetch = Histogram("openmeteo_fetch_seconds",
+                            "Time taken by requests to Open-Meteo including retries",
+                            ["outcome"])
+openmeteo_errors = Counter("openmeteo_errors_total",
+                           "Failed attempts to request Open-Meteo",
+                           ["reason"])
+rows_ingested = Counter("weather_rows_ingested_total",
+                        "Rows added to the weather database",
+                        ["table"])
+rows_ingested_last = Gauge("weather_rows_ingested_last_run",
+                           "Rows added to the weather database by the last run",
+                           ["table"])
+commit_latency = Histogram("sqlite_commit_seconds",
+                           "Time taken by session commits including the flush")
+
+
+def snapshot():
+    """Returns every metric as a json serialisable list of families."""
+    return [[metric.name, metric.kind, metric.description, metric.samples()] for metric in registry.values()]
+
+
+@remote
+def get_snapshot():
+    """Returns the metrics held by the daemon."""
+    return snapshot()
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def render(snapshots):
+    """Renders snapshots from each process in the Prometheus text format.
+
+    Args:
+        snapshots: A dictionary of process names mapped to their snapshot, the
+            name is added to each sample as the process label.
+
+    Returns:
+        A string.
+    """
+    families = {}
+    for process, families_snapshot in snapshots.items():
+        for name, kind, description, samples in families_snapshot:
+            family = families.setdefault(name, [kind, description, []])
+            family[2].extend([sample_name, {"process": process, **labels}, value]
+                             for sample_name, labels, value in samples)
+    lines = []
+    for name, (kind, description, samples) in families.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            label_text = ",".join(f"{key}=\"{escape(value)}\"" for key, value in labels.items())
+            lines.append(f"{sample_name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def before_commit(session):
+    session.info["commit_start"] = time.perf_counter()
+
+
+def after_commit(session):
+    start = session.info.pop("commit_start", None)
+    if start is not None:
+        commit_latency.observe(time.perf_counter() - start)
+
+
+def init_metrics(app):
+    """Registers the session listeners used to time commits."""
+    if not event.contains(Session, "before_commit", before_commit):
+        event.listen(Session, "before_commit", before_commit)
+        event.listen(Session, "after_commit", after_commit)
+    return
@@ -0,0 +1,173 @@
+"""Shared client used for all requests made to Open-Meteo."""
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+from datetime import date
+from urllib.parse import urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+from app.core.metrics import openmeteo_fetch, openmeteo_errors
+
+
+class OpenMeteoError(Exception):
+    """Raised when a request to Open-Meteo fails or the circuit is open."""
+
+
+class Client(object):
+    """Pooled Open-Meteo client with a disk cache, request coalescing, and retries.
+
+    Identical requests made at the same time share a single http request, responses
+    are cached on disk for ttl seconds, and repeated failures open a circuit which
+    rejects requests immediately until the cooldown has passed.
+    """
+
+    def __init__(self, cache_dir, ttl=900, timeout=10, retries=3, backoff=0.5,
+                 failure_threshold=5, cooldown=60, pool_size=10):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.failures = 0
+        self.opened_at = None
+
+    def weather_api(self, url, params):
+        """Returns a list of weather api responses for the given url and params."""
+        params = normalise(params)
+        key = hashlib.sha256(f"{url}?{urlencode(params)}".encode()).hexdigest()
+        content = self.read_cache(key)
+        if content is None:
+            content = self.coalesce(key, url, params)
+        return parse(content)
+
+    def coalesce(self, key, url, params):
+        """Shares one request between all concurrent callers with the same key."""
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+        if not leader:
+            return future.result()
+        start = time.perf_counter()
+        try:
+            content = self.fetch(url, params)
+            openmeteo_fetch.observe(time.perf_counter() - start, outcome="success")
+            self.write_cache(key, content)
+            future.set_result(content)
+        except Exception as e:
+            openmeteo_fetch.observe(time.perf_counter() - start, outcome="error")
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key)
+        return content
+
+    def fetch(self, url, params):
+        """Requests flatbuffer content with bounded retries behind the circuit breaker."""
+        with self.lock:
+            if self.opened_at and time.monotonic() - self.opened_at < self.cooldown:
+                openmeteo_errors.inc(reason="circuit_open")
+                raise OpenMeteoError("Circuit open, request rejected")
+        query = dict(params, format="flatbuffers")
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self.session.get(url, params=query, timeout=self.timeout)
+            except requests.RequestException as e:
+                openmeteo_errors.inc(reason="connection")
+                error = e
+                continue
+            if response.status_code == 400:
+                openmeteo_errors.inc(reason="bad_request")
+                raise OpenMeteoError(f"Bad request: {response.text}")
+            if response.status_code == 429 or response.status_code >= 500:
+                openmeteo_errors.inc(reason=f"status_{response.status_code}")
+                error = OpenMeteoError(f"Status code {response.status_code}")
+                continue
+            response.raise_for_status()
+            with self.lock:
+                self.failures = 0
+                self.opened_at = None
+            return response.content
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+        raise OpenMeteoError(f"Request failed after {self.retries + 1} attempts") from error
+
+    def read_cache(self, key):
+        """Returns cached content for the key if it exists and is within the ttl."""
+        path = os.path.join(self.cache_dir, f"{key}.bin")
+        try:
+            if time.time() - os.path.getmtime(path) < self.ttl:
+                with open(path, "rb") as file:
+                    return file.read()
+        except OSError:
+            pass
+        return None
+
+    def write_cache(self, key, content):
+        """Atomically writes content to the cache."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.bin")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+
+def normalise(params):
+    """Converts params into a sorted list of string pairs so equal requests share a key."""
+    normalised = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        elif isinstance(value, date):
+            value = value.isoformat()
+        normalised.append((name, str(value)))
+    return normalised
+
+
+def parse(content):
+    """Splits length prefixed flatbuffer content into weather api responses."""
+    responses = []
+    pos = 0
+    while pos < len(content):
+        length = int.from_bytes(content[pos:pos + 4], byteorder="little")
+        responses.append(WeatherApiResponse.GetRootAs(content, pos + 4))
+        pos += length + 4
+    return responses
+
+
+client = None
+client_lock = threading.Lock()
+
+
+def get_client(config):
+    """Returns the shared client, creating it from the applications config on first use."""
+    global client
+    with client_lock:
+        if client is None:
+            client = Client(cache_dir=config["OPENMETEO_CACHE_DIR"],
+                            ttl=config["OPENMETEO_CACHE_TTL"],
+                            timeout=config["OPENMETEO_TIMEOUT"],
+                            retries=config["OPENMETEO_RETRIES"],
+                            failure_threshold=config["OPENMETEO_FAILURE_THRESHOLD"],
+                            cooldown=config["OPENMETEO_COOLDOWN"])
+    return client
@@ -0,0 +1,118 @@
+"""Opt in per request profiling of wall time, SQL statements, and template rendering.
+
+Statements are counted for each bind along with their total time. Statements
+with the same shape, the SQL text with its parameters left unbound, repeated
+at least PROFILE_REPEAT_THRESHOLD times within a request are flagged as N+1
+queries. Results are added to the Server-Timing header of each response and
+kept in a rolling report.
+"""
+import time
+import threading
+from collections import deque, Counter
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from app import db
+
+report = deque(maxlen=100)
+report_lock = threading.Lock()
+
+
+def get_statement_listeners(bind_key):
+    """Returns cursor listeners that record statements for the given bind."""
+    name = bind_key or "default"
+
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "profile" in g:
+            connection.info["profile_start"] = time.perf_counter()
+
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        start = connection.info.pop("profile_start", None)
+        if has_request_context() and "profile" in g and start is not None:
+            elapsed = time.perf_counter() - start
+            binds = g.profile["binds"].setdefault(name, {"count": 0, "time": 0})
+            binds["count"] += 1
+            binds["time"] += elapsed
+            g.profile["shapes"][(name, statement)] += 1
+    return before_cursor_execute, after_cursor_execute
+
+
+def before_template(sender, template, context, **extra):
+    if "profile" in g:
+        g.profile["template_start"] = time.perf_counter()
+
+
+def after_template(sender, template, context, **extra):
+    if "profile" in g and "template_start" in g.profile:
+        g.profile["template"] += time.perf_counter() - g.profile.pop("template_start")
+
+
+def start_profile():
+    g.profile = {"start": time.perf_counter(), "binds": {}, "shapes": Counter(), "template": 0}
+
+
+def get_summary(threshold):
+    """Returns the profile of the current request as a dictionary."""
+    profile = g.profile
+    repeated = [{"bind": bind, "statement": statement, "count": count}
+                for (bind, statement), count in profile["shapes"].items() if count >= threshold]
+    return {"endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "wall": time.perf_counter() - profile["start"],
+            "template": profile["template"],
+            "binds": profile["binds"],
+            "n_plus_one": repeated}
+
+
+def get_server_timing(summary):
+    """Formats the summary as a Server-Timing header value."""
+    timings = [f"app;dur={summary['wall'] * 1000:.1f}",
+               f"template;dur={summary['template'] * 1000:.1f}"]
+    for bind, stats in summary["binds"].items():
+        timings.append(f"sql-{bind};dur={stats['time'] * 1000:.1f};desc=\"{stats['count']} statements\"")
+    if summary["n_plus_one"]:
+        timings.append(f"n-plus-one;desc=\"{len(summary['n_plus_one'])} repeated statements\"")
+    return ", ".join(timings)
+
+
+def get_report():
+    """Returns the rolling report of recent requests, most recent last."""
+    with report_lock:
+        return list(report)
+
+
+def init_profiling(app):
+    """Registers the request hooks, SQL listeners, and template signals used for profiling.
+
+    Does nothing unless PROFILE_REQUESTS is enabled.
+    """
+    global report
+    if not app.config["PROFILE_REQUESTS"]:
+        return
+    threshold = app.config["PROFILE_REPEAT_THRESHOLD"]
+    with report_lock:
+        report = deque(report, maxlen=app.config["PROFILE_REPORT_SIZE"])
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            before_cursor_execute, after_cursor_execute = get_statement_listeners(bind_key)
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    before_render_template.connect(before_template, app)
+    template_rendered.connect(after_template, app)
+
+    @app.before_request
+    def profile_request():
+        start_profile()
+
+    @app.after_request
+    def profile_response(response):
+        if "profile" not in g:
+            return response
+        summary = get_summary(threshold)
+        response.headers["Server-Timing"] = get_server_timing(summary)
+        if summary["n_plus_one"]:
+            app.logger.warning(f"Repeated statements for '{summary['path']}': {summary['n_plus_one']}")
+        with report_lock:
+            report.append(summary)
+        return response
+    return
@@ -0,0 +1,18 @@
+"""Functions that are required to execute on startup for the core module."""
+from app import db
+
+
+def init_indexes():
+    """Creates indexes declared on models that are missing from existing databases.
+
+    db.create_all only creates indexes alongside new tables, databases created
+    before an index was declared are upgraded in place here.
+
+    Run this function on startup.
+    """
+    for bind_key, metadata in db.metadatas.items():
+        engine = db.engines[bind_key]
+        for table in metadata.tables.values():
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    return
@@ -0,0 +1,76 @@
+"""Stamp files whose modification time signals changes to every process."""
+import os
+import threading
+
+
+def get_stamp(path):
+    """Returns the modification time of the stamp file or none if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def touch_stamp(path):
+    """Updates the modification time of the stamp file, creating it if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a"):
+        os.utime(path)
+    return get_stamp(path)
+
+
+class StampCache(object):
+    """Values keyed within a process that are cleared whenever a stamp file is touched.
+
+    A signature containing the modification time of the stamp file, along with
+    anything else that should clear the cache when it changes, is compared by
+    check on each lookup. Touching the stamp therefore clears the cache in every
+    process, such as web workers, the daemon, or click commands. Values are
+    loaded outside the lock and are only stored if the cache was not cleared
+    while they were loading.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.signature = None
+        self.generation = 0
+
+    def check(self, signature):
+        """Clears the cache if the signature has changed and returns the current generation."""
+        with self.lock:
+            if signature != self.signature:
+                self.values = {}
+                self.generation += 1
+                self.signature = signature
+            return self.generation
+
+    def get_or_load(self, generation, key, load, valid=None):
+        """Returns the value for the given key, loading and storing it when missing.
+
+        Args:
+            generation: Generation returned by check before the lookup.
+            key: Key of the value within the cache.
+            load: Function returning the value, none is returned without being stored.
+            valid: Optional function returning false for a cached value to be loaded again.
+        """
+        value = self.values.get(key)
+        if value is not None and (valid is None or valid(value)):
+            return value
+        value = load()
+        if value is not None:
+            with self.lock:
+                if generation == self.generation:
+                    self.values[key] = value
+        return value
+
+    def clear(self):
+        """Clears the cache in this process."""
+        with self.lock:
+            self.values = {}
+            self.generation += 1
+
+    def touch(self, path):
+        """Touches the stamp file at the given path clearing the cache in this and every other process."""
+        touch_stamp(path)
+        self.clear()
@@ -0,0 +1,24 @@
+"""Timing of each phase of application startup."""
+import time
+
+
+class StartupTimer(object):
+    """Records the time taken by each phase of startup.
+
+    Each call to mark records the time since the previous mark under the given
+    phase name, the report lists every phase with the total.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+        return f"{phases}, total {(self.last - self.start) * 1000:.0f}ms"
@@ -0,0 +1,30 @@
+"""Connection settings applied to the SQLite databases used by each bind."""
+from sqlalchemy import event
+from app import db
+
+
+def get_pragma_listener(pragmas):
+    """Returns a connect listener that sets the given pragmas on new connections."""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_pragmas
+
+
+def init_storage(app):
+    """Registers pragma listeners on the engine of every bind.
+
+    The pragmas in SQLITE_PRAGMAS are applied to every bind, SQLITE_BIND_PRAGMAS
+    overrides these for individual binds where the default bind uses the key None.
+    Must be called before any connections are made.
+    """
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            pragmas = dict(app.config["SQLITE_PRAGMAS"])
+            pragmas.update(app.config["SQLITE_BIND_PRAGMAS"].get(bind_key, {}))
+            event.listen(engine, "connect", get_pragma_listener(pragmas))
+    return
@@ -0,0 +1,120 @@
+"""Dedicated threads that execute commands for each system."""
+import time
+import queue
+import threading
+from app.core.metrics import actuation
+from app import scheduler
+
+
+class Actuator(object):
+    """Executes on, off, and run commands for a single system object.
+
+    Commands are queued and executed in order on a dedicated thread so callers
+    return immediately. Runs are timed against a monotonic deadline and wait on
+    an event, allowing cancellations to apply as soon as they are requested. The
+    lock is held for the duration of a run and replaces the plant status column
+    as the record of whether a system is in use.
+    """
+
+    def __init__(self, name, obj):
+        self.name = name
+        self.obj = obj
+        self.commands = queue.Queue()
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.deadline = None
+        self.thread = threading.Thread(target=self.work, name=f"actuator-{name}", daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self):
+        """Returns true if a run is queued or executing."""
+        return self.lock.locked()
+
+    def remaining(self):
+        """Returns the seconds remaining for the current run or none."""
+        deadline = self.deadline
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0)
+
+    def on(self):
+        """Queues the system to be enabled."""
+        self.commands.put(("on", None, None))
+
+    def off(self):
+        """Queues the system to be disabled."""
+        self.commands.put(("off", None, None))
+
+    def run_for(self, duration_sec, callback=None):
+        """Queues the system to be enabled for a duration in seconds.
+
+        Args:
+            duration_sec: An integer refering to a time in seconds.
+            callback: Optional function called with the elapsed seconds, whether the
+                run was cancelled, and whether enabling the system failed once the
+                system is disabled.
+
+        Returns:
+            False if the system is already in use, otherwise true.
+        """
+        if not self.lock.acquire(blocking=False):
+            return False
+        self.cancelled.clear()
+        self.commands.put(("run", duration_sec, callback))
+        return True
+
+    def cancel(self):
+        """Cancels the current run, returns false if the system is not in use."""
+        if not self.busy:
+            return False
+        self.cancelled.set()
+        return True
+
+    def work(self):
+        """Executes queued commands until the application exits."""
+        while True:
+            command, duration_sec, callback = self.commands.get()
+            try:
+                if command == "on":
+                    with actuation.time(system=self.name, action="on"):
+                        self.obj.on()
+                elif command == "off":
+                    with actuation.time(system=self.name, action="off"):
+                        self.obj.off()
+                elif command == "run":
+                    self.run(duration_sec, callback)
+            except Exception:
+                scheduler.app.logger.exception(f"Command '{command}' failed for '{self.name}'")
+
+    def run(self, duration_sec, callback):
+        """Enables the system until the deadline passes or the run is cancelled."""
+        start = time.monotonic()
+        cancelled = False
+        failed = False
+        try:
+            try:
+                with actuation.time(system=self.name, action="on"):
+                    self.obj.on()
+            except Exception:
+                failed = True
+                raise
+            start = time.monotonic()
+            self.deadline = start + duration_sec
+            remaining = duration_sec
+            while not cancelled and remaining > 0:
+                cancelled = self.cancelled.wait(remaining)
+                remaining = self.deadline - time.monotonic()
+        finally:
+            try:
+                with actuation.time(system=self.name, action="off"):
+                    self.obj.off()
+            finally:
+                elapsed = time.monotonic() - start
+                self.deadline = None
+                self.cancelled.clear()
+                self.lock.release()
+                state = "failed" if failed else "cancelled" if cancelled else "finished"
+                scheduler.app.logger.debug(f"Run for '{self.name}' {state} after {elapsed:.3f} seconds")
+                if callback:
+                    callback(elapsed, cancelled, failed)
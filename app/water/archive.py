@@ -0,0 +1,93 @@
+"""Archival of old watering history to compressed columnar files."""
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from app.water.models import History
+from app import db
+
+DATE_FORMAT = "%Y%m%d%H%M%S"
+
+
+def archive_history(archive_dir, max_age_days):
+    """Moves history older than max_age_days from the history table into an archive file.
+
+    Each column is stored as a separate array within a compressed npz file. The file
+    name contains the range of datetimes held, allowing queries to skip files outside
+    the range requested. Rows are only deleted once the file has been written.
+
+    Returns:
+        The number of rows archived.
+    """
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    rows = db.session.execute(db.select(History.id,
+                                        History.plant_id,
+                                        History.start_date_time,
+                                        History.duration_sec)
+                              .where(History.start_date_time < cutoff)
+                              .order_by(History.start_date_time)).all()
+    if not rows:
+        return 0
+    ids, plant_ids, start_date_times, durations = zip(*rows)
+    first = start_date_times[0].strftime(DATE_FORMAT)
+    last = start_date_times[-1].strftime(DATE_FORMAT)
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"history_{first}_{last}_{min(ids)}.npz")
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        np.savez_compressed(file,
+                            id=np.array(ids, dtype="int64"),
+                            plant_id=np.array([-1 if i is None else i for i in plant_ids], dtype="int64"),
+                            start_date_time=np.array(start_date_times, dtype="datetime64[us]"),
+                            duration_sec=np.array(durations, dtype="int64"))
+    os.replace(temp_path, path)
+    # Deleted by range rather than listing ids which could exceed the bound parameter limit.
+    db.session.execute(db.delete(History).where(History.start_date_time < cutoff, History.id <= max(ids)))
+    db.session.commit()
+    return len(rows)
+
+
+def get_archive_files(archive_dir, start_date_time, end_date_time):
+    """Returns paths to archive files that may contain datetimes within the range."""
+    if not os.path.isdir(archive_dir):
+        return []
+    paths = []
+    for file_name in sorted(os.listdir(archive_dir)):
+        if not file_name.endswith(".npz"):
+            continue
+        _, first, last, _ = file_name[:-4].split("_")
+        if datetime.strptime(first, DATE_FORMAT) <= end_date_time and datetime.strptime(last, DATE_FORMAT) >= start_date_time:
+            paths.append(os.path.join(archive_dir, file_name))
+    return paths
+
+
+def get_history(archive_dir, start_date_time, end_date_time, plant_id=None):
+    """Retrieves history within a range of datetimes from both the history table and archive.
+
+    Args:
+        archive_dir: Directory containing archive files.
+        start_date_time: Earliest datetime to include.
+        end_date_time: Latest datetime to include.
+        plant_id: Optional id of a plant to filter by.
+
+    Returns:
+        A list of tuples containing the plant id, start datetime, and duration of each
+        watering ordered by start datetime.
+    """
+    history = []
+    start = np.datetime64(start_date_time, "us")
+    end = np.datetime64(end_date_time, "us")
+    for path in get_archive_files(archive_dir, start_date_time, end_date_time):
+        with np.load(path) as archive:
+            mask = (archive["start_date_time"] >= start) & (archive["start_date_time"] <= end)
+            if plant_id is not None:
+                mask &= archive["plant_id"] == plant_id
+            history.extend(zip(archive["plant_id"][mask].tolist(),
+                               archive["start_date_time"][mask].tolist(),
+                               archive["duration_sec"][mask].tolist()))
+    query = (db.select(History.plant_id, History.start_date_time, History.duration_sec)
+             .where(History.start_date_time.between(start_date_time, end_date_time)))
+    if plant_id is not None:
+        query = query.where(History.plant_id == plant_id)
+    history.extend(tuple(row) for row in db.session.execute(query))
+    history.sort(key=lambda row: row[1])
+    return history
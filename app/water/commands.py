@@ -0,0 +1,10 @@
+"""Click commands used by flask application."""
+import click
+from flask import current_app
+from app.water.usage import rebuild_usage as rebuild
+
+
+@click.command()
+def rebuild_usage():
+    """Recreates watering usage rollups from the history table and archive."""
+    rebuild(current_app.config["HISTORY_ARCHIVE_DIR"])
@@ -0,0 +1,88 @@
+"""Controls for the watering process and its jobs.
+
+These are called by routes and run within the scheduler daemon when one is
+used, otherwise they run within the current process.
+"""
+import time
+from flask import current_app
+from app.core.ipc import remote, remote_stream
+from app.water.queries import get_plant
+from app.water.jobs import process, schedule_dispatch
+from app.water.events import get_bus
+from app import actuators, hardware_ready
+
+
+@remote
+def start_process(plant_id, duration_sec):
+    """Starts the watering process, returns false if the plants system is not ready or already running."""
+    return process(duration_sec, plant_id)
+
+
+@remote
+def cancel_process(plant_id):
+    """Cancels the watering process, returns false if the plants system is not running."""
+    if not hardware_ready.is_set():
+        return False
+    plant = get_plant(plant_id)
+    if not actuators[plant.system.name].cancel():
+        return False
+    get_bus(current_app.config).publish({"event": "cancelling", "plant_id": plant_id})
+    return True
+
+
+@remote
+def get_status(plant_id):
+    """Returns whether the hardware is ready, the plants system is running, and the seconds remaining."""
+    if not hardware_ready.is_set():
+        return {"ready": False, "running": False, "remaining": None}
+    plant = get_plant(plant_id)
+    actuator = actuators[plant.system.name]
+    return {"ready": True, "running": actuator.busy, "remaining": actuator.remaining()}
+
+
+@remote
+def reschedule(plant_id):
+    """Updates the dispatch job after the plants config has changed."""
+    schedule_dispatch()
+    return
+
+
+@remote
+def unschedule(plant_id):
+    """Updates the dispatch job after the plant has been deleted."""
+    schedule_dispatch()
+    return
+
+
+@remote
+def get_job(plant_id):
+    """Returns the name and next run time of the plants automatic watering or none."""
+    plant = get_plant(plant_id)
+    if plant is None or not plant.config.enabled or plant.config.job_due is None:
+        return None
+    return {"name": f"auto_water{plant_id}", "next_run_time": plant.config.job_due.isoformat()}
+
+
+@remote_stream
+def get_events():
+    """Yields lists of watering status events as they are published.
+
+    An empty list is yielded as a keepalive when nothing is published within
+    WATER_EVENTS_KEEPALIVE_SEC and the stream ends after WATER_EVENTS_MAX_SEC,
+    clients reconnect automatically. When events were dropped because the
+    subscriber fell behind a resync event is yielded first.
+    """
+    config = current_app.config
+    bus = get_bus(config)
+    subscription = bus.subscribe()
+    deadline = time.monotonic() + config["WATER_EVENTS_MAX_SEC"]
+    dropped = 0
+    try:
+        while time.monotonic() < deadline:
+            events = subscription.get(config["WATER_EVENTS_KEEPALIVE_SEC"])
+            if subscription.dropped != dropped:
+                dropped = subscription.dropped
+                events.insert(0, {"event": "resync"})
+            yield events
+    finally:
+        bus.unsubscribe(subscription)
@@ -0,0 +1,88 @@
+"""Hands due plants to their actuators within concurrency and supply limits."""
+import threading
+from functools import partial
+from app.water.planner import get_capacity, fits
+
+
+class Dispatcher(object):
+    """Queues watering processes and starts at most limit of them at once.
+
+    Runs only start while the flow drawn from their supply is within its
+    capacity. Runs that cannot start wait in order and are started as earlier
+    runs finish, skipping ahead of runs on a supply that is still full.
+    """
+
+    def __init__(self, limit, config):
+        self.limit = limit
+        self.config = config
+        self.lock = threading.Lock()
+        self.pending = []
+        self.running = 0
+        self.used = {}
+
+    def submit(self, plant_id, duration_sec, supply, flow):
+        """Queues a watering process for the given plant."""
+        with self.lock:
+            self.pending.append((plant_id, duration_sec, supply, flow))
+        self.drain()
+
+    def has_pending(self, supply):
+        """Returns true if a run on the given supply is waiting to start."""
+        with self.lock:
+            return any(run[2] == supply for run in self.pending)
+
+    def next_run(self):
+        """Removes and returns the first pending run that can start or none."""
+        if self.running >= self.limit:
+            return None
+        for run in self.pending:
+            plant_id, duration_sec, supply, flow = run
+            if fits(self.used.get(supply, 0), flow, get_capacity(supply, self.config)):
+                self.pending.remove(run)
+                self.running += 1
+                self.used[supply] = self.used.get(supply, 0) + flow
+                return run
+        return None
+
+    def drain(self):
+        """Starts pending processes while within the limits.
+
+        The slot and flow of a run are freed straight away when its process does
+        not start or raises, otherwise they are freed by the callback.
+        """
+        from app.water.jobs import process
+        from app import scheduler
+        while True:
+            with self.lock:
+                run = self.next_run()
+            if run is None:
+                return
+            plant_id, duration_sec, supply, flow = run
+            try:
+                started = process(duration_sec, plant_id, callback=partial(self.release, supply, flow))
+            except Exception:
+                scheduler.app.logger.exception(f"Failed to start watering process for plant {plant_id}")
+                started = False
+            if not started:
+                self.release(supply, flow, drain=False)
+
+    def release(self, supply, flow, drain=True):
+        """Frees the flow and slot of a finished process and starts the next pending processes."""
+        with self.lock:
+            self.running -= 1
+            self.used[supply] = round(self.used[supply] - flow, 6)
+        if drain:
+            self.drain()
+
+
+dispatcher = None
+dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(config):
+    """Returns the shared dispatcher, creating it from the applications config on first use."""
+    global dispatcher
+    with dispatcher_lock:
+        if dispatcher is None:
+            dispatcher = Dispatcher(config["WATER_CONCURRENCY_LIMIT"], config)
+    return dispatcher
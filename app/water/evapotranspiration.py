@@ -0,0 +1,71 @@
+"""Water balance from stored hourly weather used to size watering durations."""
+from datetime import datetime, timezone
+import numpy as np
+from app.weather.series import get_arrays
+
+
+def get_reference_et(temperature, humidity):
+    """Returns the hourly reference evapotranspiration in millimetres.
+
+    Uses the Romanenko equation as only temperature and humidity are stored,
+    the monthly value is spread evenly over each hour.
+
+    Args:
+        temperature: An array of temperatures in degrees celsius.
+        humidity: An array of relative humidities as percentages.
+
+    Returns:
+        An array of the same shape.
+    """
+    return 0.0018 * (25 + temperature) ** 2 * np.clip(100 - humidity, 0, 100) / (30 * 24)
+
+
+def get_date(date_time):
+    """Returns the UTC date of a naive date time in the local time of this process.
+
+    Hourly records are stored by their UTC date and time as returned by Open-Meteo,
+    so windows are bounded by UTC dates.
+    """
+    return datetime.fromtimestamp(date_time.timestamp(), timezone.utc).date()
+
+
+def get_durations(configs, app_config):
+    """Calculates adjusted watering durations for all given configs in one pass.
+
+    Hourly records between the earliest job_init and latest job_due are read with
+    a single query. Evapotranspiration and rainfall are summed over each plants
+    window from job_init to job_due using cumulative sums, windows that are only
+    partly stored are scaled by the hours available. The deficit is compared with
+    the evapotranspiration the configured duration is meant to replace. Hourly times
+    are UTC, windows are compared as seconds since the epoch of the naive local
+    job_init and job_due.
+
+    Args:
+        configs: Entries in the config table with et_adjust enabled.
+        app_config: The applications config.
+
+    Returns:
+        A dictionary of plant ids mapped to their duration in seconds, zero when
+        rainfall has met the deficit. Plants without stored weather keep their
+        configured duration.
+    """
+    if not configs:
+        return {}
+    start_date = min(get_date(config.job_init) for config in configs)
+    end_date = max(get_date(config.job_due) for config in configs)
+    times, values = get_arrays(start_date, end_date, ["temperature", "humidity", "precipitation"])
+    et = np.concatenate(([0], np.cumsum(get_reference_et(values[:, 0], values[:, 1]))))
+    rain = np.concatenate(([0], np.cumsum(values[:, 2])))
+    starts = np.array([config.job_init.timestamp() for config in configs])
+    ends = np.array([config.job_due.timestamp() for config in configs])
+    durations = np.array([config.duration_sec for config in configs], dtype="float64")
+    first = np.searchsorted(times, starts, side="left")
+    last = np.searchsorted(times, ends, side="right")
+    hours = last - first
+    window_hours = np.maximum((ends - starts) / 3600, 1)
+    scale = np.divide(window_hours, hours, out=np.zeros_like(window_hours), where=hours > 0)
+    deficit = np.maximum((et[last] - et[first]) - app_config["WATER_ET_EFFECTIVE_RAIN"] * (rain[last] - rain[first]), 0) * scale
+    reference = app_config["WATER_ET_REFERENCE_MM_DAY"] * window_hours / 24
+    factor = np.clip(deficit / reference, 0, app_config["WATER_ET_MAX_FACTOR"])
+    adjusted = np.where(hours > 0, np.round(durations * factor), durations).astype("int64")
+    return {config.plant_id: int(duration) for config, duration in zip(configs, adjusted)}
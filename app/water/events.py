@@ -0,0 +1,15 @@
+"""Watering status events pushed to connected clients."""
+import threading
+from app.core.bus import Bus
+
+bus = None
+bus_lock = threading.Lock()
+
+
+def get_bus(config):
+    """Returns the shared status bus, creating it from the applications config on first use."""
+    global bus
+    with bus_lock:
+        if bus is None:
+            bus = Bus(config["WATER_EVENTS_BUFFER"])
+    return bus
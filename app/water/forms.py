@@ -34,4 +34,5 @@ class ConfigForm(FlaskForm):
     default = TimeField("Default Water Time", validators=[DataRequired()])
     rain_reset = BooleanField("Postpone on Rainfall")
     threshold_mm = IntegerField("Volume of Rainfall Threshold (Millimetres)", validators=[DataRequired()])
+    et_adjust = BooleanField("Adjust Duration by Evapotranspiration")
     submit = SubmitField("Save")
@@ -0,0 +1,149 @@
+"""GPIO backends used by the system classes.
+
+Pump and Valve use the GPIO object defined here rather than importing
+RPi.GPIO directly. The backend is selected from the applications config,
+allowing the watering process to run on machines without GPIO pins.
+"""
+import threading
+
+
+class Backend(object):
+    """Forwards attribute access to the selected GPIO implementation.
+
+    RPi.GPIO is imported on first use when no backend has been selected.
+    """
+
+    def __init__(self):
+        self.impl = None
+
+    def select(self, impl):
+        self.impl = impl
+
+    def __getattr__(self, name):
+        if self.impl is None:
+            import RPi.GPIO
+            self.impl = RPi.GPIO
+        return getattr(self.impl, name)
+
+
+class SimulatedGPIO(object):
+    """Simulated GPIO pins with a timing model of the garden hardware.
+
+    Outputs take relay_delay_sec to switch. Relays listed in wiring drive the
+    switch input they are mapped to, while energised the switch moves towards
+    the opposite level following the bounce pattern one step every
+    bounce_interval_sec. A 0 in the pattern is the starting level and a 1 the
+    opposite level, the default reproduces the readings seen from the valve.
+    """
+
+    BOARD = 10
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, relay_delay_sec=0.01, bounce_pattern="000010101101111",
+                 bounce_interval_sec=0.005, wiring=None):
+        self.relay_delay_sec = relay_delay_sec
+        self.bounce_pattern = bounce_pattern
+        self.bounce_interval_sec = bounce_interval_sec
+        self.wiring = wiring or {}
+        self.lock = threading.Lock()
+        self.levels = {}
+        self.callbacks = {}
+        self.movements = {}
+
+    def setmode(self, mode):
+        return
+
+    def setwarnings(self, flag):
+        return
+
+    def setup(self, channel, direction, pull_up_down=None, initial=0):
+        with self.lock:
+            if direction == self.IN:
+                self.levels[channel] = 1 if pull_up_down == self.PUD_UP else 0
+            else:
+                self.levels[channel] = initial
+
+    def input(self, channel):
+        with self.lock:
+            return self.levels[channel]
+
+    def output(self, channel, value):
+        value = int(bool(value))
+        with self.lock:
+            movement = self.movements.pop(channel, None)
+        if movement:
+            movement.set()
+        stopped = threading.Event()
+        with self.lock:
+            self.movements[channel] = stopped
+        threading.Thread(target=self.switch, args=(channel, value, stopped), daemon=True).start()
+
+    def switch(self, channel, value, stopped):
+        """Applies an output after the relay delay and moves any wired switch."""
+        if stopped.wait(self.relay_delay_sec):
+            return
+        self.set_level(channel, value)
+        switch = self.wiring.get(channel)
+        if not value or switch is None:
+            return
+        start = self.input(switch)
+        for step in self.bounce_pattern:
+            if stopped.wait(self.bounce_interval_sec):
+                return
+            self.set_level(switch, start ^ int(step))
+
+    def set_level(self, channel, value):
+        """Sets the level of a channel and runs its edge callbacks."""
+        with self.lock:
+            previous = self.levels.get(channel)
+            self.levels[channel] = value
+            edge, callbacks = self.callbacks.get(channel, (None, []))
+        if previous == value or edge is None:
+            return
+        if edge == self.BOTH or (edge == self.RISING) == bool(value):
+            for callback in callbacks:
+                callback(channel)
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        with self.lock:
+            self.callbacks[channel] = (edge, [callback] if callback else [])
+
+    def add_event_callback(self, channel, callback):
+        with self.lock:
+            self.callbacks[channel][1].append(callback)
+
+    def remove_event_detect(self, channel):
+        with self.lock:
+            self.callbacks.pop(channel, None)
+
+    def cleanup(self, channel=None):
+        with self.lock:
+            for movement in self.movements.values():
+                movement.set()
+            self.movements.clear()
+
+
+GPIO = Backend()
+
+
+def init_gpio(config):
+    """Selects the GPIO backend specified within the applications config."""
+    if config["GPIO_BACKEND"] == "simulated":
+        GPIO.select(SimulatedGPIO(relay_delay_sec=config["GPIO_RELAY_DELAY_SEC"],
+                                  bounce_pattern=config["GPIO_BOUNCE_PATTERN"],
+                                  bounce_interval_sec=config["GPIO_BOUNCE_INTERVAL_SEC"],
+                                  wiring=config["GPIO_WIRING"]))
+    else:
+        import RPi.GPIO
+        GPIO.select(RPi.GPIO)
+    return
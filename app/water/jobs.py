@@ -1,12 +1,39 @@
 """All functions required for scheduling and executing the watering process."""
-import time
+import threading
 from datetime import timedelta, datetime
-import pytz
-import openmeteo_requests
-from astral import LocationInfo
-from astral.sun import sun
-from app.water.models import Plant, History
-from app import db, scheduler, events
+from app.core.ephemeris import get_suntimes
+from app.weather.queries import get_precipitation_sums
+from app.water.models import Plant, History, Config
+from app.water.usage import record_usage
+from app.water.queries import get_plant
+from app.water.dispatcher import get_dispatcher
+from app.water.planner import plan, simulate
+from app.water.events import get_bus
+from app.core.metrics import runs_in_flight
+from app import db, scheduler, actuators, hardware_ready
+
+
+def schedule_archive():
+    """Adds the job archive_history to the scheduler if it is not already in the job store."""
+    if not scheduler.get_job("archive_history"):
+        scheduler.add_job(func=archive_old_history,
+                          trigger="cron",
+                          minute="0",
+                          hour="2",
+                          id="archive_history",
+                          name="archive_history",
+                          **scheduler.app.config["SCHEDULER_MISFIRE_POLICIES"]["archive_history"])
+    return
+
+
+def archive_old_history():
+    """Function used by the scheduler to move old history into the archive."""
+    from app.water.archive import archive_history
+    with scheduler.app.app_context():
+        count = archive_history(scheduler.app.config["HISTORY_ARCHIVE_DIR"],
+                                scheduler.app.config["HISTORY_ARCHIVE_AGE_DAYS"])
+    scheduler.app.logger.debug(f"Archived {count} history records")
+    return count
 
 
 def get_due_date(config):
@@ -14,7 +41,8 @@ def get_due_date(config):
 
     Converts the value of occurence_days within config to a datetime object which is then
     added to the current date. This date then has its time replaced with the corresponding
-    sunrise, sunset, or default value.
+    sunrise, sunset, or default value. Sun times are read from the precomputed tables
+    in app.core.ephemeris rather than calculated per call.
 
     Args:
         config: An entry in the config table for a plant.
@@ -23,18 +51,10 @@ def get_due_date(config):
         A datetime object.
     """
     due = datetime.now().replace(microsecond=0) + timedelta(days=config.occurrence_days)
-    city = LocationInfo(scheduler.app.config["CITY"],
-                        scheduler.app.config["REGION"],
-                        scheduler.app.config["TIMEZONE"],
-                        scheduler.app.config["LATITUDE"],
-                        scheduler.app.config["LONGITUDE"])
-    tz = pytz.timezone(scheduler.app.config["TIMEZONE"])
-    s = sun(city.observer, tzinfo=tz, date=due)
+    sunrise, sunset = get_suntimes(due, scheduler.app.config)
     if config.mode == 1:
-        sunset = s["sunset"].time()
         due = due.replace(hour=sunset.hour, minute=sunset.minute, second=sunset.second)
     elif config.mode == 2:
-        sunrise = s["sunrise"].time()
         due = due.replace(hour=sunrise.hour, minute=sunrise.minute, second=sunrise.second)
     else:
         default = config.default
@@ -42,111 +62,230 @@ def get_due_date(config):
     return due
 
 
-def remove_job(plant_id):
-    """Removes the job auto_water from the scheduler for the given plant."""
-    job = f"auto_water{plant_id}"
-    if scheduler.get_job(job):
-        scheduler.remove_job(job)
-    return
-
+def schedule_dispatch():
+    """Schedules the job dispatch for the earliest due date of all enabled plants.
 
-def schedule_job(plant):
-    """Adds the job auto_water to the scheduler for the given plant."""
-    job_name = f"auto_water{plant.id}"
-    scheduler.add_job(func=auto_water,
+    The config table acts as a priority queue of due plants ordered by job_due, the
+    scheduler holds a single job which wakes once for each distinct due date. The job
+    is removed when no plants are enabled.
+    """
+    earliest = db.session.scalar(db.select(db.func.min(Config.job_due)).where(Config.enabled.is_(True)))
+    if earliest is None:
+        if scheduler.get_job("dispatch"):
+            scheduler.remove_job("dispatch")
+        return
+    scheduler.add_job(func=dispatch,
                       trigger="date",
-                      run_date=plant.config.job_due,
-                      id=job_name,
-                      name=job_name,
-                      args=[plant.id])
+                      run_date=earliest,
+                      id="dispatch",
+                      name="dispatch",
+                      replace_existing=True,
+                      **scheduler.app.config["SCHEDULER_MISFIRE_POLICIES"]["dispatch"])
     return
 
 
-def auto_water(plant_id):
+def dispatch():
     """Function used by the scheduler for automatic execution of the watering process.
 
-    The watering process is only skipped when rain_reset is enabled in the plants config
-    and check_rain returns true, otherwise the watering process always executes. The
-    plants config is updated where this job is scheduled again for the new due date.
-
-    Args:
-        plant_id: Unique id given to a plant.
+    All enabled plants that are due are loaded in a single query and their rainfall is
+    checked with a single lookup. Plants are skipped when rain_reset is enabled in their
+    config and the threshold is met, or when they are overdue by more than the grace
+    period such as after the application was down. Durations for plants with et_adjust
+    enabled are sized by the water balance of all of them in one pass, plants whose
+    deficit has been met by rainfall are skipped. Remaining plants are planned
+    against the capacity of their water supply and handed to the dispatcher which
+    limits how many run at once. Every due plant is then given a new due date and
+    the job is scheduled for the next earliest due date, even when a lookup or
+    planning fails, so a failure never stops automatic watering. Failed rainfall
+    lookups are treated as the threshold not being met and failed evapotranspiration
+    lookups keep the configured durations.
     """
     with scheduler.app.app_context():
-        plant = Plant.query.filter(Plant.id == plant_id).first()
-        # Checks plants statuses are false so the manual and automatic watering processes don't overlap.
-        # Also ensures the process only executes when rain reset is disabled or the threshold isn't met.
-        if not plant.status and (not plant.config.rain_reset or not check_rain(plant.config)):
-            process(plant.config.duration_sec, plant.id)
-        else:
-            scheduler.app.logger.info("Rain reset and threshold met or attempt to execute job when already running")
-        plant.config.job_init = datetime.now().replace(microsecond=0)
-        plant.config.job_due = get_due_date(plant.config)
-        schedule_job(plant)
-        db.session.commit()
+        hardware_ready.wait(scheduler.app.config["HARDWARE_READY_TIMEOUT"])
+        now = datetime.now().replace(microsecond=0)
+        grace = timedelta(seconds=scheduler.app.config["WATER_MISSED_GRACE_SEC"])
+        plants = []
+        try:
+            plants = (Plant.query
+                      .join(Plant.config)
+                      .options(db.contains_eager(Plant.config), db.joinedload(Plant.system))
+                      .filter(Config.enabled.is_(True), Config.job_due <= now)
+                      .all())
+            try:
+                rain_met = check_rain([plant.config for plant in plants if plant.config.rain_reset])
+            except Exception:
+                scheduler.app.logger.exception("Failed to check rainfall, rain reset thresholds treated as not met")
+                rain_met = set()
+            try:
+                durations = get_et_durations([plant.config for plant in plants if plant.config.et_adjust])
+            except Exception:
+                scheduler.app.logger.exception("Failed to adjust durations by evapotranspiration, configured durations used")
+                durations = {}
+            runs = []
+            for plant in plants:
+                duration_sec = durations.get(plant.id, plant.config.duration_sec)
+                if now - plant.config.job_due > grace:
+                    scheduler.app.logger.info(f"Missed watering for '{plant.name}' due {plant.config.job_due}")
+                elif plant.id in rain_met:
+                    scheduler.app.logger.info(f"Rain reset and threshold met for '{plant.name}'")
+                elif duration_sec <= 0:
+                    scheduler.app.logger.info(f"Evapotranspiration deficit met by rainfall for '{plant.name}'")
+                else:
+                    runs.append((plant.id, plant.system.name, duration_sec))
+        finally:
+            for plant in plants:
+                plant.config.job_init = now
+                plant.config.job_due = get_due_date(plant.config)
+            db.session.commit()
+            schedule_dispatch()
+        planned = plan(runs, scheduler.app.config)
+        if planned:
+            window_sec, starts = simulate(planned, scheduler.app.config, scheduler.app.config["WATER_CONCURRENCY_LIMIT"])
+            scheduler.app.logger.debug(f"Planned {len(planned)} runs over {window_sec} seconds with pump starts {starts}")
+        dispatcher = get_dispatcher(scheduler.app.config)
+        for plant_id, duration_sec, supply, flow in planned:
+            dispatcher.submit(plant_id, duration_sec, supply, flow)
+        scheduler.app.logger.debug(f"Dispatched {len(plants)} plants")
     return
 
 
-def check_rain(config):
-    """Returns true if rainfall meets the threshold specified within the config."""
+def check_rain(configs):
+    """Returns the ids of plants where rainfall meets the threshold specified within their config.
+
+    Rainfall for every date between the earliest job_init and latest job_due is read
+    from the hourly records held in the weather database with a single query. Plants
+    whose stored rainfall already meets their threshold need nothing more, only dates
+    missing from the database for the remaining plants are requested from Open-Meteo.
+
+    Args:
+        configs: Entries in the config table for plants with rain_reset enabled.
+
+    Returns:
+        A set of plant ids.
+    """
+    if not configs:
+        return set()
+    start_date = min(config.job_init.date() for config in configs)
+    end_date = max(config.job_due.date() for config in configs)
+    rainfall = get_precipitation_sums(start_date, end_date)
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    windows = {}
+    for config in configs:
+        first = (config.job_init.date() - start_date).days
+        last = (config.job_due.date() - start_date).days
+        windows[config.plant_id] = (dates[first:last + 1], config.threshold_mm)
+    rain_met = {plant_id for plant_id, (window, threshold_mm) in windows.items()
+                if sum(rainfall.get(date, 0) for date in window) >= threshold_mm}
+    missing = sorted({date for plant_id, (window, _) in windows.items() if plant_id not in rain_met
+                      for date in window if date not in rainfall})
+    if missing:
+        scheduler.app.logger.debug(f"Requesting rainfall for {len(missing)} dates missing from database")
+        rainfall.update(get_rain_sums(missing))
+        rain_met.update(plant_id for plant_id, (window, threshold_mm) in windows.items()
+                        if sum(rainfall.get(date, 0) for date in window) >= threshold_mm)
+    return rain_met
+
+
+def get_et_durations(configs):
+    """Returns watering durations sized by evapotranspiration for the given configs."""
+    if not configs:
+        return {}
+    from app.water.evapotranspiration import get_durations
+    durations = get_durations(configs, scheduler.app.config)
+    scheduler.app.logger.debug(f"Adjusted durations by evapotranspiration {durations}")
+    return durations
+
+
+def get_rain_sums(dates):
+    """Requests daily rainfall from Open-Meteo and returns the sum for each of the given dates."""
+    from app.core.openmeteo import get_client
     url = scheduler.app.config["URL"]
     params = {
         "latitude": scheduler.app.config["LATITUDE"],
         "longitude": scheduler.app.config["LONGITUDE"],
         "daily": "precipitation_sum",
         "timezone": scheduler.app.config["TIMEZONE"],
-        "start_date": config.job_init.date(),
-        "end_date": config.job_due.date()
+        "start_date": dates[0],
+        "end_date": dates[-1]
     }
-    om = openmeteo_requests.Client()
-    responses = om.weather_api(url, params=params)
+    responses = get_client(scheduler.app.config).weather_api(url, params)
     response = responses[0]
     daily = response.Daily()
-    rain_sum = sum(daily.Variables(0).ValuesAsNumpy())
-    if rain_sum >= config.threshold_mm:
-        return True
-    else:
-        return False
+    values = daily.Variables(0).ValuesAsNumpy()
+    return {date: float(values[(date - dates[0]).days]) for date in dates}
 
 
-def process(duration_sec, plant_id):
-    """Enables and disables system objects for a time in seconds.
+def process(duration_sec, plant_id, callback=None):
+    """Queues the watering process for the system assigned to the given plant.
 
-    Enables the system object assigned to the plant and sleeps for the duration
-    specified. After the duration or upon an event update the system object is
-    disabled. The plant status is updated alongside the system object to ensure
-    the process cannot run in multiple instances
+    The run is handed to the systems actuator which enables the system, waits for
+    the duration specified or a cancellation, then disables it. This returns as soon
+    as the run is queued so scheduler and request threads are not held. Once the run
+    finishes its history and the usage rollups are updated with the seconds actually
+    watered, runs where the system failed to enable are removed from the history and
+    not counted. Started, finished, cancelled, and failed events are published to the
+    status bus.
 
     Args:
         duration_sec: An integer refering to a time in seconds.
         plant_id: Unique id given to a plant.
+        callback: Optional function called once the run finishes.
+
+    Returns:
+        False if the hardware is not ready, the plant no longer exists, or the system is
+        already in use, otherwise true.
     """
+    if not hardware_ready.is_set():
+        scheduler.app.logger.debug("Hardware is not ready")
+        return False
     with scheduler.app.app_context():
-        plant_selected = Plant.query.filter(Plant.id == plant_id).first()
-        plant_selected.status = True
-        plant_selected.history.append(History(start_date_time=datetime.now(), duration_sec=duration_sec))
-        db.session.commit()
-        scheduler.app.logger.debug(f"Set status of '{plant_selected.name}' to {plant_selected.status}")
-        scheduler.app.logger.debug(f"Watering '{plant_selected.name}' for {duration_sec} seconds")
-        event = events[plant_selected.name]
-        plant_selected.system.obj.on()
-        loop(duration_sec, event)
-        plant_selected.system.obj.off()
-        plant_selected.status = False
+        plant_selected = get_plant(plant_id)
+        if plant_selected is None:
+            scheduler.app.logger.debug(f"Plant {plant_id} no longer exists")
+            return False
+        name = plant_selected.name
+        actuator = actuators[plant_selected.system.name]
+        start_date_time = datetime.now()
+        bus = get_bus(scheduler.app.config)
+
+        history = History(start_date_time=start_date_time, duration_sec=duration_sec)
+        plant_selected.history.append(history)
         db.session.commit()
-        scheduler.app.logger.debug(f"Set status of '{plant_selected.name}' to {plant_selected.status}")
-        scheduler.app.logger.debug(f"Finished watering process for '{plant_selected.name}'")
-    return
+        history_id = history.id
+        announced = threading.Event()
 
+        def finished(elapsed, cancelled, failed):
+            # Runs failing straight away are reported after they were announced as started.
+            announced.wait()
+            state = "Failed" if failed else "Cancelled" if cancelled else "Finished"
+            scheduler.app.logger.debug(f"{state} watering process for '{name}' after {elapsed:.1f} seconds")
+            runs_in_flight.dec()
+            bus.publish({"event": state.lower(), "plant_id": plant_id, "elapsed": round(elapsed, 1)})
+            try:
+                with scheduler.app.app_context():
+                    if failed:
+                        db.session.execute(db.delete(History).where(History.id == history_id))
+                        db.session.commit()
+                    else:
+                        elapsed_sec = round(elapsed)
+                        db.session.execute(db.update(History)
+                                           .where(History.id == history_id)
+                                           .values(duration_sec=elapsed_sec))
+                        record_usage(plant_id, start_date_time, elapsed_sec)
+            finally:
+                if callback:
+                    callback()
 
-def loop(duration_sec, event):
-    """The inner loop used to sleep by the watering process."""
-    scheduler.app.logger.debug("Loop started")
-    for x in range(duration_sec):
-        time.sleep(1)
-        if event.is_set():
-            scheduler.app.logger.debug("Loop cancelled")
-            event.clear()
-            return
-    scheduler.app.logger.debug("Loop stopped")
-    return
+        runs_in_flight.inc()
+        if not actuator.run_for(duration_sec, finished):
+            runs_in_flight.dec()
+            db.session.delete(history)
+            db.session.commit()
+            scheduler.app.logger.debug(f"System for '{name}' is already running")
+            return False
+        try:
+            bus.publish({"event": "started", "plant_id": plant_id, "remaining": duration_sec})
+        finally:
+            announced.set()
+        scheduler.app.logger.debug(f"Watering '{name}' for {duration_sec} seconds")
+    return True
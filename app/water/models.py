@@ -3,11 +3,15 @@ from app import db
 
 
 class System(db.Model):
-    """Model for system table."""
+    """Model for system table.
+
+    Systems are described by their class name and pin map, the objects that
+    control them are held by the actuators registry and never stored.
+    """
     __bind_key__ = "water"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
-    obj = db.Column(db.PickleType)
+    pins = db.Column(db.JSON)
     plant = db.relationship("Plant", uselist=False, backref="system")
 
     def __repr__(self):
@@ -18,12 +22,13 @@ class Plant(db.Model):
     """Model for plant table."""
     __bind_key__ = "water"
     id = db.Column(db.Integer, primary_key=True)
-    system_id = db.Column(db.Integer, db.ForeignKey("system.id"))
+    system_id = db.Column(db.Integer, db.ForeignKey("system.id"), index=True)
     name = db.Column(db.String)
     description = db.Column(db.String)
     status = db.Column(db.Boolean)
     history = db.relationship("History", backref="plant", cascade="all, delete-orphan")
     config = db.relationship("Config", uselist=False, backref="plant", cascade="all, delete-orphan")
+    usage = db.relationship("Usage", backref="plant", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Plant: {self.name}>"
@@ -33,7 +38,7 @@ class History(db.Model):
     """Model for history table."""
     __bind_key__ = "water"
     id = db.Column(db.Integer, primary_key=True)
-    plant_id = db.Column(db.Integer, db.ForeignKey("plant.id"))
+    plant_id = db.Column(db.Integer, db.ForeignKey("plant.id"), index=True)
     start_date_time = db.Column(db.DateTime)
     duration_sec = db.Column(db.Integer)
 
@@ -45,7 +50,7 @@ class Config(db.Model):
     """Model for config table."""
     __bind_key__ = "water"
     id = db.Column(db.Integer, primary_key=True)
-    plant_id = db.Column(db.Integer, db.ForeignKey("plant.id"))
+    plant_id = db.Column(db.Integer, db.ForeignKey("plant.id"), index=True)
     enabled = db.Column(db.Boolean)
     duration_sec = db.Column(db.Integer)
     occurrence_days = db.Column(db.Integer)
@@ -53,9 +58,29 @@ class Config(db.Model):
     default = db.Column(db.Time)
     rain_reset = db.Column(db.Boolean)
     threshold_mm = db.Column(db.Integer)
+    et_adjust = db.Column(db.Boolean, default=False)
     last_edit = db.Column(db.DateTime)
     job_init = db.Column(db.DateTime)
-    job_due = db.Column(db.DateTime)
+    job_due = db.Column(db.DateTime, index=True)
 
     def __repr__(self):
         return f"<Config: {self.id}>"
+
+
+class Usage(db.Model):
+    """Model for usage table.
+
+    Holds the number of waterings and total duration for each plant per day,
+    week, or month. Rows are updated as each watering process finishes.
+    """
+    __bind_key__ = "water"
+    __table_args__ = (db.UniqueConstraint("plant_id", "period", "start"),)
+    id = db.Column(db.Integer, primary_key=True)
+    plant_id = db.Column(db.Integer, db.ForeignKey("plant.id"))
+    period = db.Column(db.String(5))
+    start = db.Column(db.Date)
+    count = db.Column(db.Integer)
+    duration_sec = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f"<Usage: {self.period} {self.start}>"
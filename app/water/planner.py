@@ -0,0 +1,92 @@
+"""Plans watering runs against the flow capacity of each water supply.
+
+Systems draw a flow from a supply, usually a shared pump. Runs on the same
+supply only start together while their total flow is within its capacity,
+runs on different supplies start together. Runs on each supply are ordered
+longest first so the supply stays busy through back to back zones.
+"""
+from itertools import zip_longest
+
+
+def get_supply(system_name, config):
+    """Returns the supply name and flow drawn by the given system.
+
+    Systems missing from WATER_SYSTEM_SUPPLY use the default supply with a flow of 1.
+    """
+    return tuple(config["WATER_SYSTEM_SUPPLY"].get(system_name, (config["WATER_DEFAULT_SUPPLY"], 1)))
+
+
+def get_capacity(supply, config):
+    """Returns the flow capacity of the given supply, defaulting to a single run at a time."""
+    return config["WATER_SUPPLY_CAPACITY"].get(supply, 1)
+
+
+def fits(used, flow, capacity):
+    """Returns true if a run with the given flow can start on a supply.
+
+    A run whose flow alone exceeds the capacity may still start on an idle
+    supply, otherwise it would never run.
+    """
+    return used == 0 or used + flow <= capacity
+
+
+def plan(runs, config):
+    """Orders runs so each supply is kept busy and within capacity.
+
+    Args:
+        runs: A list of plant id, system name, and duration in seconds tuples.
+        config: The applications config.
+
+    Returns:
+        A list of plant id, duration in seconds, supply, and flow tuples in the
+        order they should be submitted.
+    """
+    supplies = {}
+    for plant_id, system_name, duration_sec in runs:
+        supply, flow = get_supply(system_name, config)
+        supplies.setdefault(supply, []).append((plant_id, duration_sec, supply, flow))
+    for queued in supplies.values():
+        queued.sort(key=lambda run: run[1], reverse=True)
+    # Interleaves supplies so independent supplies start together.
+    return [run for group in zip_longest(*supplies.values()) for run in group if run]
+
+
+def simulate(planned, config, limit):
+    """Simulates the plan and returns the total watering window and number of pump starts.
+
+    Runs are started in the same way as by the dispatcher, each run is assumed
+    to take exactly its duration. A supply restarted as soon as it becomes idle
+    is held on by the pump so is not counted as another start.
+
+    Args:
+        planned: A list of runs as returned by plan.
+        config: The applications config.
+        limit: The maximum number of runs at once.
+
+    Returns:
+        The window in seconds and a dictionary of pump starts per supply.
+    """
+    pending = list(planned)
+    running = []
+    used = {}
+    starts = {}
+    idle_since = {}
+    now = 0
+    while pending or running:
+        for run in list(pending):
+            plant_id, duration_sec, supply, flow = run
+            if len(running) >= limit:
+                break
+            if fits(used.get(supply, 0), flow, get_capacity(supply, config)):
+                if not used.get(supply) and idle_since.get(supply) != now:
+                    starts[supply] = starts.get(supply, 0) + 1
+                used[supply] = used.get(supply, 0) + flow
+                running.append((now + duration_sec, supply, flow))
+                pending.remove(run)
+        now = min(end for end, _, _ in running)
+        for finished in [run for run in running if run[0] == now]:
+            running.remove(finished)
+            used[finished[1]] = round(used[finished[1]] - finished[2], 6)
+            if not used[finished[1]]:
+                idle_since[finished[1]] = now
+    return now, starts
@@ -1,19 +1,77 @@
 """Required for using outdoor pump."""
-import RPi.GPIO as GPIO
+import threading
+from app.water.gpio import GPIO
 
 
 class Pump(object):
-    """Controls outdoor pump."""
+    """Controls outdoor pump.
 
-    def __init__(self, relay):
-        self.relay = relay
+    Systems sharing a pump relay share its state, the relay is switched
+    on by the first system to use it and off once the last has finished.
+    When queued returns true for the pumps supply another zone is about to
+    start, so switching off is held for hold_sec and that zone reuses the
+    running pump rather than cycling it. The number of times each relay
+    was switched on is recorded in starts.
+    """
+
+    lock = threading.Lock()
+    relays = {}
+    queued = None
+
+    def __init__(self, relay, hold_sec=0, supply=None):
+        self.pump_relay = relay
+        self.hold_sec = hold_sec
+        self.supply = supply
         GPIO.setmode(GPIO.BOARD)
-        GPIO.setup(self.relay, GPIO.OUT)
+        GPIO.setup(self.pump_relay, GPIO.OUT)
+        with Pump.lock:
+            Pump.relays.setdefault(relay, {"users": 0, "timer": None, "starts": 0})
+
+    def pins(self):
+        return {"pump_relay": self.pump_relay}
+
+    @property
+    def starts(self):
+        return Pump.relays[self.pump_relay]["starts"]
 
     def on(self):
-        GPIO.output(self.relay, True)
+        with Pump.lock:
+            state = Pump.relays[self.pump_relay]
+            if state["timer"] is not None:
+                # Pump is still held on from the previous zone.
+                state["timer"].cancel()
+                state["timer"] = None
+            elif state["users"] == 0:
+                GPIO.output(self.pump_relay, True)
+                state["starts"] += 1
+            state["users"] += 1
         return
 
     def off(self):
-        GPIO.output(self.relay, False)
+        with Pump.lock:
+            state = Pump.relays[self.pump_relay]
+            if state["users"] == 0:
+                # Not in use, such as on startup, so switch off immediately.
+                if state["timer"] is not None:
+                    state["timer"].cancel()
+                    state["timer"] = None
+                GPIO.output(self.pump_relay, False)
+                return
+            state["users"] -= 1
+            if state["users"] == 0:
+                if self.hold_sec and Pump.queued is not None and Pump.queued(self.supply):
+                    state["timer"] = threading.Timer(self.hold_sec, self.release)
+                    state["timer"].daemon = True
+                    state["timer"].start()
+                else:
+                    GPIO.output(self.pump_relay, False)
+        return
+
+    def release(self):
+        """Switches the pump off once the hold expires unless another zone has started."""
+        with Pump.lock:
+            state = Pump.relays[self.pump_relay]
+            if state["timer"] is threading.current_thread() and state["users"] == 0:
+                GPIO.output(self.pump_relay, False)
+                state["timer"] = None
         return
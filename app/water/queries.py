@@ -0,0 +1,54 @@
+"""Queries used by routes and controls to read plants with their system and config."""
+from app.core.stamp import StampCache, get_stamp
+from app.water.models import Plant, System
+from app import db
+
+
+def get_plant(plant_id):
+    """Retrieves the plant for the given id with its system and config in a single statement.
+
+    Returns:
+        A plant or none if it does not exist.
+    """
+    return (Plant.query
+            .options(db.joinedload(Plant.system), db.joinedload(Plant.config))
+            .filter(Plant.id == plant_id)
+            .first())
+
+
+def get_plants():
+    """Retrieves every plant ordered by id with its system and config in a single statement."""
+    return (Plant.query
+            .options(db.joinedload(Plant.system), db.joinedload(Plant.config))
+            .order_by(Plant.id)
+            .all())
+
+
+def get_available_systems():
+    """Retrieves the id and name of every system not assigned to a plant."""
+    return db.session.execute(db.select(System.id, System.name)
+                              .outerjoin(Plant, Plant.system_id == System.id)
+                              .where(Plant.id.is_(None))
+                              .order_by(System.id)).all()
+
+
+class NavigationCache(StampCache):
+    """Holds the id and name of every plant used to build the links on water pages.
+
+    Invalidating the cache touches the WATER_NAVIGATION_STAMP file whenever plants
+    are created, deleted, or configured, so changes made by other processes clear
+    the cache too.
+    """
+
+    def invalidate(self, config):
+        """Clears the cached list in this and every other process."""
+        self.touch(config["WATER_NAVIGATION_STAMP"])
+
+    def get(self, config):
+        """Returns the id and name of every plant ordered by id."""
+        generation = self.check(get_stamp(config["WATER_NAVIGATION_STAMP"]))
+        return self.get_or_load(generation, "plants",
+                                lambda: db.session.execute(db.select(Plant.id, Plant.name).order_by(Plant.id)).all())
+
+
+navigation_cache = NavigationCache()
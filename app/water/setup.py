@@ -1,52 +1,93 @@
 """Functions that are required to execute on startup for the water module."""
 import inspect
-from datetime import datetime
-from threading import Event
+from flask import current_app
 from app.water.models import Plant, System
-from app.water.jobs import schedule_job, get_due_date
+from app.water.jobs import schedule_dispatch, schedule_archive
 from app.water import systems
-from app import db, events
+from app.water.actuator import Actuator
+from app.water.dispatcher import get_dispatcher
+from app.water.planner import get_supply
+from app.water.pump import Pump
+from app import db, actuators
 
 
 def get_classes(package):
-    """Retrieves all classes in package."""
+    """Retrieves all classes defined in package, ignoring imported classes."""
     classes = []
     for name, _class in inspect.getmembers(package):
-        if inspect.isclass(_class):
+        if inspect.isclass(_class) and _class.__module__ == package.__name__:
             classes.append((name, _class))
     return classes
 
 
+def upgrade_systems():
+    """Adds the pins column to system tables created when system objects were pickled."""
+    engine = db.engines["water"]
+    columns = [column["name"] for column in db.inspect(engine).get_columns("system")]
+    if "pins" not in columns:
+        with engine.begin() as connection:
+            connection.execute(db.text("ALTER TABLE system ADD COLUMN pins JSON"))
+    return
+
+
+def upgrade_configs():
+    """Adds the et_adjust column to config tables created before it was declared."""
+    engine = db.engines["water"]
+    columns = [column["name"] for column in db.inspect(engine).get_columns("config")]
+    if "et_adjust" not in columns:
+        with engine.begin() as connection:
+            connection.execute(db.text("ALTER TABLE config ADD COLUMN et_adjust BOOLEAN DEFAULT 0"))
+    return
+
+
 def init_systems():
-    """Resets and inserts systems into the system table.
+    """Resets and inserts systems into the system table and starts their actuators.
+
+    Each system object is created once and registered with an actuator under
+    the systems name, only its name and pins are stored in the system table.
+    Pumps are given their supply and hold pumps on between zones queued on it
+    by the dispatcher.
 
     Run this function on startup.
     """
-    existing_systems = [system.name for system in System.query.all()]
+    upgrade_systems()
+    Pump.queued = get_dispatcher(current_app.config).has_pending
+    existing_systems = {system.name: system for system in System.query.all()}
     classes = get_classes(systems)
     for name, _class in classes:
         obj = _class()
+        if isinstance(obj, Pump):
+            obj.supply = get_supply(name, current_app.config)[0]
+            obj.hold_sec = current_app.config["WATER_PUMP_HOLD_SEC"]
         obj.off()
-        if name not in existing_systems:
-            db.session.add(System(name=name, obj=obj))
+        actuators[name] = Actuator(name, obj)
+        pins = obj.pins() if hasattr(obj, "pins") else None
+        if name in existing_systems:
+            existing_systems[name].pins = pins
+        else:
+            db.session.add(System(name=name, pins=pins))
     db.session.commit()
     return
 
 
 def init_plants():
-    """Resets statuses, schedules jobs and creates event obj's for plants.
+    """Resets statuses and schedules the dispatch job for plants.
+
+    Plants that became due while the application was down are handled by the
+    first dispatch.
 
     Run this function on startup.
     """
-    plants = Plant.query.all()
-    for plant in plants:
-        events[plant.name] = Event()
-        plant.status = False
-        if plant.config.enabled:
-            now = datetime.now().replace(microsecond=0)
-            if now >= plant.config.job_due:
-                plant.config.job_init = now
-                plant.config.job_due = get_due_date(plant.config)
-            schedule_job(plant)
+    db.session.execute(db.update(Plant).values(status=False))
     db.session.commit()
+    schedule_dispatch()
+    return
+
+
+def init_jobs():
+    """Adds water jobs that are not specific to a plant to the scheduler.
+
+    Run this function on startup.
+    """
+    schedule_archive()
     return
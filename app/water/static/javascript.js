@@ -1 +1,48 @@
-// add js to reload plant status when process starts/cancelled
+// Updates the running status of the selected plant as watering events are pushed.
+document.addEventListener("DOMContentLoaded", function () {
+    var status = document.getElementById("running-status");
+    if (!status || !window.EventSource) {
+        return;
+    }
+    var remaining = document.getElementById("remaining");
+    var plantId = Number(status.dataset.plantId);
+    var deadline = status.dataset.remaining ? Date.now() + Number(status.dataset.remaining) * 1000 : null;
+
+    function showRemaining() {
+        if (deadline) {
+            remaining.textContent = Math.max(0, Math.round((deadline - Date.now()) / 1000)) + " seconds";
+        } else {
+            remaining.textContent = "";
+        }
+    }
+
+    function onEvent(name, handler) {
+        source.addEventListener(name, function (message) {
+            var data = JSON.parse(message.data);
+            if (data.plant_id === plantId) {
+                handler(data);
+                showRemaining();
+            }
+        });
+    }
+
+    var source = new EventSource(status.dataset.eventsUrl);
+    onEvent("started", function (data) {
+        status.textContent = "True";
+        deadline = Date.now() + data.remaining * 1000;
+    });
+    onEvent("cancelling", function () {
+        status.textContent = "Cancelling";
+    });
+    ["finished", "cancelled", "failed"].forEach(function (name) {
+        onEvent(name, function () {
+            status.textContent = "False";
+            deadline = null;
+        });
+    });
+    source.addEventListener("resync", function () {
+        window.location.reload();
+    });
+    showRemaining();
+    setInterval(showRemaining, 1000);
+});
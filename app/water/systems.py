@@ -2,7 +2,8 @@
 
 Ensure a method called on and off are included for each class present.
 These methods will be called during the watering process so make sure
-everything is as mentioned. In the case where multiple systems or devices
+everything is as mentioned. A method called pins should return the pins
+used so they can be recorded in the system table. In the case where multiple systems or devices
 are used for one plant combine them into a single class.
 """
 from app.water.valve import Valve
@@ -17,11 +18,14 @@ class ValvePump(Valve, Pump):
         self.wait = 2
 
     def on(self):
-        Valve.on()
+        Valve.on(self)
         time.sleep(self.wait)
-        Pump.on()
+        Pump.on(self)
 
     def off(self):
-        Valve.off()
+        Valve.off(self)
         time.sleep(self.wait)
-        Pump.off()
+        Pump.off(self)
+
+    def pins(self):
+        return {**Valve.pins(self), **Pump.pins(self)}
@@ -0,0 +1,80 @@
+"""Rollups of watering history per plant for days, weeks, and months."""
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.water.models import Plant, Usage
+from app import db
+
+PERIODS = ["day", "week", "month"]
+
+
+def get_starts(start_date_time):
+    """Returns the start date of the day, week, and month containing the given datetime."""
+    day = start_date_time.date()
+    return {
+        "day": day,
+        "week": day - timedelta(days=day.weekday()),
+        "month": day.replace(day=1)
+    }
+
+
+def record_usage(plant_id, start_date_time, duration_sec):
+    """Adds a single watering to the day, week, and month rollups of a plant."""
+    rows = [{"plant_id": plant_id, "period": period, "start": start, "count": 1, "duration_sec": duration_sec}
+            for period, start in get_starts(start_date_time).items()]
+    statement = sqlite_insert(Usage)
+    statement = statement.on_conflict_do_update(
+        index_elements=["plant_id", "period", "start"],
+        set_={"count": Usage.count + 1, "duration_sec": Usage.duration_sec + statement.excluded.duration_sec})
+    db.session.execute(statement, rows)
+    db.session.commit()
+    return
+
+
+def get_usage(plant_id, period, start_date=None, end_date=None):
+    """Retrieves rollups for a plant.
+
+    Args:
+        plant_id: Unique id given to a plant.
+        period: One of day, week, or month.
+        start_date: Optional earliest period start to include.
+        end_date: Optional latest period start to include.
+
+    Returns:
+        A list of rows containing the start, count, and duration_sec of each period.
+    """
+    query = (db.select(Usage.start, Usage.count, Usage.duration_sec)
+             .where(Usage.plant_id == plant_id, Usage.period == period)
+             .order_by(Usage.start))
+    if start_date:
+        query = query.where(Usage.start >= start_date)
+    if end_date:
+        query = query.where(Usage.start <= end_date)
+    return db.session.execute(query).all()
+
+
+def rebuild_usage(archive_dir):
+    """Recreates all rollups from the history table and archive files.
+
+    Archived history is included so rollups for periods older than the archive
+    cutoff are kept, history of plants that no longer exist is ignored.
+
+    Args:
+        archive_dir: Directory containing archive files.
+    """
+    from app.water.archive import get_history
+    plant_ids = set(db.session.scalars(db.select(Plant.id)))
+    totals = {}
+    for plant_id, start_date_time, duration_sec in get_history(archive_dir, datetime.min, datetime.max):
+        if plant_id not in plant_ids:
+            continue
+        for period, start in get_starts(start_date_time).items():
+            total = totals.setdefault((plant_id, period, start), [0, 0])
+            total[0] += 1
+            total[1] += duration_sec
+    rows = [{"plant_id": plant_id, "period": period, "start": start, "count": count, "duration_sec": duration_sec}
+            for (plant_id, period, start), (count, duration_sec) in totals.items()]
+    db.session.execute(db.delete(Usage))
+    if rows:
+        db.session.execute(db.insert(Usage), rows)
+    db.session.commit()
+    return
@@ -1,6 +1,7 @@
 """Required for using outdoor valve."""
 import time
-import RPi.GPIO as GPIO
+import threading
+from app.water.gpio import GPIO
 
 
 class Valve(object):
@@ -10,47 +11,86 @@ class Valve(object):
     and often look like 000010101101111. Thus, the
     following methods deal with this and avoid leaving
     the valve half open.
+
+    Edges on the switch are detected by interrupt and
+    debounced, the valve is only considered moved once
+    the switch has left and then settled on the target
+    level for settle_sec. The number of bounces and the
+    settle time of the last movement are recorded.
     """
 
-    def __init__(self, relay, switch):
+    def __init__(self, relay, switch, settle_sec=0.2, timeout_sec=30):
         self.relay = relay
         self.switch = switch
+        self.settle_sec = settle_sec
+        self.timeout_sec = timeout_sec
+        self.bounces = 0
+        self.settle_time = None
+        self.changed = threading.Condition()
+        self.edges = 0
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(self.relay, GPIO.OUT)
         GPIO.setup(self.switch, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        self.level = GPIO.input(self.switch)
+        GPIO.add_event_detect(self.switch, GPIO.BOTH, callback=self.edge)
+
+    def pins(self):
+        return {"relay": self.relay, "switch": self.switch}
+
+    def edge(self, channel):
+        """Records the switch level on every edge and wakes any waiting movement."""
+        with self.changed:
+            self.level = GPIO.input(channel)
+            self.edges += 1
+            self.changed.notify_all()
 
     def on(self):
-        high = False
-        low = False
-        GPIO.output(self.relay, True)
-        while True:
-            i = GPIO.input(self.switch)
-            if (i == 0):
-                low = True
-                time.sleep(0.1)
-            elif (i == 1):
-                high = True
-                time.sleep(0.1)
-            if high and not low:
-                high = False
-            elif high and low:
-                GPIO.output(self.relay, False)
-                return
+        self.move(1)
+        return
 
     def off(self):
-        high = False
-        low = False
+        self.move(0)
+        return
+
+    def move(self, target):
+        """Drives the valve until the switch leaves and then settles on the target level.
+
+        Args:
+            target: Switch level that signals the valve has finished moving.
+
+        Raises:
+            TimeoutError: The switch did not settle within timeout_sec.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout_sec
+        bounces = 0
         GPIO.output(self.relay, True)
-        while True:
-            i = GPIO.input(self.switch)
-            if (i == 0):
-                low = True
-                time.sleep(0.1)
-            elif (i == 1):
-                high = True
-                time.sleep(0.1)
-            if low and not high:
-                low = False
-            elif high and low:
-                GPIO.output(self.relay, False)
-                return
+        try:
+            with self.changed:
+                seen = self.edges
+                left = self.level != target
+                settled_at = None
+                while True:
+                    now = time.monotonic()
+                    if self.edges != seen:
+                        seen = self.edges
+                        if settled_at is not None:
+                            bounces += 1
+                            settled_at = None
+                    if self.level != target:
+                        left = True
+                    elif left and settled_at is None:
+                        settled_at = now
+                    if settled_at is not None and now - settled_at >= self.settle_sec:
+                        break
+                    if now >= deadline:
+                        raise TimeoutError(f"Valve switch did not settle within {self.timeout_sec} seconds")
+                    if settled_at is None:
+                        self.changed.wait(deadline - now)
+                    else:
+                        self.changed.wait(min(deadline, settled_at + self.settle_sec) - now)
+        finally:
+            GPIO.output(self.relay, False)
+            self.bounces = bounces
+            self.settle_time = time.monotonic() - start
+        return
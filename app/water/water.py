@@ -1,25 +1,23 @@
 """Routes for the water module."""
+import json
 from datetime import datetime
-from threading import Event
-from flask import render_template, flash, current_app, redirect, url_for, request
+from flask import render_template, flash, current_app, redirect, url_for, request, Response, stream_with_context
 from flask_login import login_required, current_user
-from app.water.models import Config, Plant, System
+from app.water.models import Config, Plant, History, Usage
 from app.water.forms import WaterForm, ConfigForm, PlantForm
-from app.water.jobs import process, remove_job, schedule_job, get_due_date
+from app.water.jobs import get_due_date
+from app.water.queries import get_plant, get_plants, get_available_systems, navigation_cache
+from app.water.control import start_process, cancel_process, get_status, reschedule, unschedule, get_job, get_events
 from app.water import water_bp
-from app import db, events, scheduler
+from app import db
 
 
 @water_bp.route("/setup", methods=["GET", "POST"])
 @login_required
 def setup():
-    """Creates plants and assigns default configs and event objs."""
+    """Creates plants and assigns default configs."""
     plant_form = PlantForm()
-    systems_in_use = [plant.system.id for plant in Plant.query.all()]
-    systems_available = []
-    for system in System.query.all():
-        if system.id not in systems_in_use:
-            systems_available.append((system.id, system.name))
+    systems_available = [(system.id, system.name) for system in get_available_systems()]
     current_app.logger.debug(f"Systems available {systems_available}")
     if not systems_available:
         flash("No Systems Available", category="info")
@@ -33,18 +31,19 @@ def setup():
                             default=datetime.strptime("6", "%H").time(),
                             rain_reset=False,
                             threshold_mm=1,
+                            et_adjust=False,
                             last_edit=datetime.now().replace(microsecond=0))
         new_plant = Plant(system_id=plant_form.system.data,
                           name=name,
                           description=plant_form.description.data,
                           status=False,
                           config=new_config)
-        events[name] = Event()
         db.session.add(new_plant)
         db.session.commit()
+        navigation_cache.invalidate(current_app.config)
         current_app.logger.debug(f"New plant '{name}' created")
         return redirect(url_for("water_bp.setup"))
-    plants_available = Plant.query.order_by(Plant.id).all()
+    plants_available = get_plants()
     return render_template("water/setup.html",
                            user=current_user,
                            plant_form=plant_form,
@@ -54,13 +53,16 @@ def setup():
 @water_bp.route("/delete/<int:plant_id>", methods=["GET", "POST"])
 @login_required
 def delete(plant_id):
-    """Deletes plants, related jobs, and events for the given plant id."""
-    plant_selected = Plant.query.filter(Plant.id == plant_id).first()
+    """Deletes plants and related jobs for the given plant id."""
+    plant_selected = get_plant(plant_id)
     if plant_selected:
-        events.pop(plant_selected.name)
-        remove_job(plant_selected.id)
+        # Bulk delete history and usage so they are not loaded and deleted row by row.
+        db.session.execute(db.delete(History).where(History.plant_id == plant_selected.id))
+        db.session.execute(db.delete(Usage).where(Usage.plant_id == plant_selected.id))
         db.session.delete(plant_selected)
         db.session.commit()
+        navigation_cache.invalidate(current_app.config)
+        unschedule(plant_id=plant_id)
         flash("Deleted Plant", category="success")
         current_app.logger.debug(f"Deleted plant '{plant_selected.name}'")
     else:
@@ -72,12 +74,10 @@ def delete(plant_id):
 @login_required
 def configure(plant_id):
     """Configures automated watering settings for the given plant id."""
-    plant_selected = Plant.query.filter(Plant.id == plant_id).first()
+    plant_selected = get_plant(plant_id)
     if plant_selected:
         config_form = ConfigForm()
         if request.method == "POST" and config_form.validate():
-            # Remove existing jobs when config is updated.
-            remove_job(plant_selected.id)
             now = datetime.now().replace(microsecond=0)
             plant_selected.config.enabled = config_form.enabled.data
             plant_selected.config.duration_sec = config_form.duration_sec.data
@@ -86,12 +86,15 @@ def configure(plant_id):
             plant_selected.config.default = config_form.default.data
             plant_selected.config.rain_reset = config_form.rain_reset.data
             plant_selected.config.threshold_mm = config_form.threshold_mm.data
+            plant_selected.config.et_adjust = config_form.et_adjust.data
             plant_selected.config.last_edit = now
             if plant_selected.config.enabled:
                 plant_selected.config.job_init = now
                 plant_selected.config.job_due = get_due_date(plant_selected.config)
-                schedule_job(plant_selected)
             db.session.commit()
+            navigation_cache.invalidate(current_app.config)
+            # Replace existing jobs when config is updated.
+            reschedule(plant_id=plant_selected.id)
             current_app.logger.debug(f"Config for '{plant_selected.name}' updated")
             return redirect(url_for("water_bp.configure", plant_id=plant_id))
         # Prefill forms with current plants configuration.
@@ -102,9 +105,12 @@ def configure(plant_id):
         config_form.default.default = plant_selected.config.default
         config_form.rain_reset.default = plant_selected.config.rain_reset
         config_form.threshold_mm.default = plant_selected.config.threshold_mm
+        config_form.et_adjust.default = plant_selected.config.et_adjust
         config_form.process()
-        active_job = scheduler.get_job(f"auto_water{plant_selected.id}")
-        plants_available = Plant.query.order_by(Plant.id).all()
+        active_job = get_job(plant_id=plant_selected.id)
+        if active_job:
+            active_job["next_run_time"] = datetime.fromisoformat(active_job["next_run_time"])
+        plants_available = navigation_cache.get(current_app.config)
         return render_template("water/configure.html",
                                user=current_user,
                                plant_selected=plant_selected,
@@ -132,9 +138,9 @@ def utility():
 @login_required
 def configure_check():
     """Checks if plants exist and redirects accordingly."""
-    plant = Plant.query.first()
-    if plant:
-        return redirect(url_for("water_bp.configure", plant_id=plant.id))
+    plants = navigation_cache.get(current_app.config)
+    if plants:
+        return redirect(url_for("water_bp.configure", plant_id=plants[0].id))
     else:
         flash("Must Create Plant", category="error")
         return redirect(url_for("water_bp.setup"))
@@ -144,25 +150,25 @@ def configure_check():
 @login_required
 def water(plant_id):
     """Schedules the watering process now for the given plant id."""
-    plant_selected = Plant.query.filter(Plant.id == plant_id).first()
+    plant_selected = get_plant(plant_id)
     if plant_selected:
         water_form = WaterForm()
+        status = get_status(plant_id=plant_selected.id)
         if request.method == "POST" and water_form.validate():
-            if plant_selected.status:
-                flash("Already Runnning", category="error")
-            else:
-                job_name = f"manual_water{plant_selected.id}"
-                scheduler.add_job(func=process,
-                                  id=job_name,
-                                  name=job_name,
-                                  args=[water_form.duration_sec.data, plant_selected.id])
+            if not status["ready"]:
+                flash("Hardware Not Ready", category="error")
+            elif start_process(plant_id=plant_selected.id, duration_sec=water_form.duration_sec.data):
                 current_app.logger.debug("Started manual water process")
                 flash("Started Process", category="success")
+            else:
+                flash("Already Runnning", category="error")
             return redirect(url_for("water_bp.water", plant_id=plant_id))
-        plants_available = Plant.query.order_by(Plant.id).all()
+        plants_available = navigation_cache.get(current_app.config)
         return render_template("water/water.html",
                                user=current_user,
                                plant_selected=plant_selected,
+                               running=status["running"],
+                               remaining=status["remaining"],
                                water_form=water_form,
                                plants_available=plants_available)
     else:
@@ -174,9 +180,9 @@ def water(plant_id):
 @login_required
 def water_check():
     """Checks if plants exist and redirects accordingly."""
-    plant = Plant.query.first()
-    if plant:
-        return redirect(url_for("water_bp.water", plant_id=plant.id))
+    plants = navigation_cache.get(current_app.config)
+    if plants:
+        return redirect(url_for("water_bp.water", plant_id=plants[0].id))
     else:
         flash("Must Create Plant", category="error")
         return redirect(url_for("water_bp.setup"))
@@ -186,11 +192,10 @@ def water_check():
 @login_required
 def cancel(plant_id):
     """Cancels manual or automated watering process for the given plant id."""
-    plant_selected = Plant.query.filter(Plant.id == plant_id).first()
+    plant_selected = get_plant(plant_id)
     if plant_selected:
-        if plant_selected.status:
-            events[plant_selected.name].set()
-            current_app.logger.debug(f"Set event for '{plant_selected.name}'")
+        if cancel_process(plant_id=plant_selected.id):
+            current_app.logger.debug(f"Cancelled process for '{plant_selected.name}'")
             flash("Stopped Process", category="success")
         else:
             flash("Not Running", category="error")
@@ -198,3 +203,20 @@ def cancel(plant_id):
     else:
         flash("Does Not Exist", category="error")
         return redirect(url_for("water_bp.water_check"))
+
+
+@water_bp.route("/events", methods=["GET"])
+@login_required
+def events():
+    """Streams watering status events for all plants as server sent events."""
+    batches = get_events()
+
+    def generate():
+        for batch in batches:
+            if not batch:
+                yield ": keepalive\n\n"
+            for event in batch:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    return Response(stream_with_context(generate()),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
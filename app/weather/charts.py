@@ -0,0 +1,69 @@
+"""Cache of chart payloads used when rendering the weather page."""
+from flask import current_app
+from app.core.stamp import StampCache, get_stamp
+from app.weather.models import Daily, Hourly
+from app import db
+
+
+class ChartCache(StampCache):
+    """Holds the available dates and a chart payload for each daily record.
+
+    Payloads are built when weather data is ingested and are cleared whenever
+    the daily or hourly tables change, pages are then rendered from the cache
+    without querying or formatting hourly records. Invalidating the cache
+    touches the CHART_CACHE_STAMP file so changes made by other processes, such
+    as the daemon or click commands, are detected by comparing its modification
+    time along with the count and maximum id of the daily table.
+    """
+
+    def invalidate(self):
+        """Clears all cached payloads in this and every other process."""
+        self.touch(current_app.config["CHART_CACHE_STAMP"])
+
+    def get_available(self):
+        """Returns the id and date of every daily record ordered by date."""
+        signature = tuple(db.session.execute(db.select(db.func.count(Daily.id), db.func.max(Daily.id))).one())
+        generation = self.check(signature + (get_stamp(current_app.config["CHART_CACHE_STAMP"]),))
+        return self.get_or_load(generation, "available",
+                                lambda: db.session.execute(db.select(Daily.id, Daily.date).order_by(Daily.date)).all())
+
+    def get_chart(self, daily_id):
+        """Returns the chart payload for the given daily id or none if it does not exist."""
+        return self.get_or_load(self.generation, daily_id, lambda: self.build(daily_id))
+
+    def build_all(self):
+        """Builds payloads for every daily record."""
+        for daily_id, _ in self.get_available():
+            self.get_chart(daily_id)
+        return
+
+    def build(self, daily_id):
+        """Retrieves and formats the daily and hourly data for the given daily id."""
+        daily = db.session.execute(db.select(Daily.date,
+                                             Daily.sunrise,
+                                             Daily.sunset,
+                                             Daily.weather_description)
+                                   .where(Daily.id == daily_id)).first()
+        if daily is None:
+            return None
+        hourly = db.session.execute(db.select(Hourly.time,
+                                              Hourly.temperature,
+                                              Hourly.humidity,
+                                              Hourly.precipitation_probability,
+                                              Hourly.precipitation)
+                                    .where(Hourly.daily_id == daily_id)
+                                    .order_by(Hourly.time)).all()
+        time, temperature, humidity, precipitation_probability, precipitation = zip(*hourly) if hourly else ([],) * 5
+        return {
+            "daily": daily._asdict(),
+            "hourly": {
+                "time": [t.strftime("%H:%M") for t in time],
+                "temperature": list(temperature),
+                "humidity": list(humidity),
+                "precipitation_probability": list(precipitation_probability),
+                "precipitation": list(precipitation)
+            }
+        }
+
+
+chart_cache = ChartCache()
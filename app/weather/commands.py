@@ -2,6 +2,7 @@
 import click
 from app import db
 from app.weather.models import Daily
+from app.weather.charts import chart_cache
 
 
 @click.command()
@@ -12,6 +13,7 @@ def drop_day(day_id):
     if day:
         db.session.delete(day)
         db.session.commit()
+        chart_cache.invalidate()
     else:
         print("Error")
 
@@ -23,3 +25,4 @@ def drop_all_days():
     for day in days:
         db.session.delete(day)
     db.session.commit()
+    chart_cache.invalidate()
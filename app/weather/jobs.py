@@ -1,17 +1,34 @@
 """All functions required for retrieving weather data."""
 import os
 import yaml
-import pytz
-import openmeteo_requests
 import pandas as pd
 import numpy as np
-from astral import LocationInfo
-from astral.sun import sun
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.ephemeris import get_suntimes
+from app.core.openmeteo import get_client
+from app.core.metrics import rows_ingested, rows_ingested_last
 from app.weather.models import Daily, Hourly
+from app.weather.charts import chart_cache
 from app import db, scheduler
 
 
-@scheduler.task("cron", id="get_weather", minute="0", hour="1", day="*", month="*", day_of_week="*")
+def schedule_weather():
+    """Adds the job get_weather to the scheduler if it is not already in the job store.
+
+    Existing jobs are kept so runs missed while the application was down are
+    handled by the misfire policy rather than being replaced.
+    """
+    if not scheduler.get_job("get_weather"):
+        scheduler.add_job(func=get_weather,
+                          trigger="cron",
+                          minute="0",
+                          hour="1",
+                          id="get_weather",
+                          name="get_weather",
+                          **scheduler.app.config["SCHEDULER_MISFIRE_POLICIES"]["get_weather"])
+    return
+
+
 def get_weather():
     """Function used by the scheduler for automatic retrieval of weather data."""
     response = get_response()
@@ -20,7 +37,12 @@ def get_weather():
     daily_dataframe = insert_suntimes(daily_dataframe)
     daily_dataframe, hourly_dataframe = delete_anomalies(daily_dataframe, hourly_dataframe)
     daily_count, hourly_count = insert_into_db(daily_dataframe, hourly_dataframe)
+    for table, count in (("daily", daily_count), ("hourly", hourly_count)):
+        rows_ingested.inc(count, table=table)
+        rows_ingested_last.set(count, table=table)
     delete_old_records()
+    with scheduler.app.app_context():
+        chart_cache.build_all()
     return daily_count, hourly_count
 
 
@@ -38,45 +60,53 @@ def get_response():
         "timezone": scheduler.app.config["TIMEZONE"],
         "past_days": 3
     }
-    om = openmeteo_requests.Client()
-    responses = om.weather_api(url, params=params)
+    responses = get_client(scheduler.app.config).weather_api(url, params)
     response = responses[0]
     return response
 
 
+def load_wmo_descriptions():
+    """Builds an array of descriptions indexed by wmo code from wmo_codes.yaml."""
+    base_path = os.path.abspath(os.path.dirname(__file__))
+    file_path = os.path.join(base_path, "wmo_codes.yaml")
+    with open(file_path, "r") as file:
+        data = yaml.safe_load(file)
+    descriptions = np.full(max(data["codes"]) + 1, "Unknown", dtype=object)
+    for code, description in data["codes"].items():
+        descriptions[code] = description
+    return descriptions
+
+
+WMO_DESCRIPTIONS = load_wmo_descriptions()
+
+
+def get_datetimes(variables):
+    """Decodes the time range of daily or hourly response variables."""
+    return pd.date_range(
+        start=pd.to_datetime(variables.Time(), unit="s", utc=True),
+        end=pd.to_datetime(variables.TimeEnd(), unit="s", utc=True),
+        freq=pd.Timedelta(seconds=variables.Interval()),
+        inclusive="left"
+    )
+
+
 def format_response(response):
     """Formats responses and returns daily and hourly dataframes."""
     hourly = response.Hourly()
-    hourly_temperature = np.round(hourly.Variables(0).ValuesAsNumpy().astype("float64"), 2)
-    hourly_humidity = hourly.Variables(1).ValuesAsNumpy().astype(int)
-    hourly_precipitation_probability = hourly.Variables(2).ValuesAsNumpy().astype(int)
-    hourly_precipitation = np.round(hourly.Variables(3).ValuesAsNumpy().astype("float64"), 2)
-    hourly_datetime_dataframe = pd.DataFrame({"datetime": pd.date_range(
-        start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-        end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-        freq=pd.Timedelta(seconds=hourly.Interval()),
-        inclusive="left"
-    )})
+    hourly_datetime = get_datetimes(hourly)
     hourly_data = {
-        "date": pd.to_datetime(hourly_datetime_dataframe["datetime"]).dt.date,
-        "time": pd.to_datetime(hourly_datetime_dataframe["datetime"]).dt.time,
-        "temperature": hourly_temperature,
-        "humidity": hourly_humidity,
-        "precipitation_probability": hourly_precipitation_probability,
-        "precipitation": hourly_precipitation
+        "date": hourly_datetime.date,
+        "time": hourly_datetime.time,
+        "temperature": np.round(hourly.Variables(0).ValuesAsNumpy().astype("float64"), 2),
+        "humidity": hourly.Variables(1).ValuesAsNumpy().astype(int),
+        "precipitation_probability": hourly.Variables(2).ValuesAsNumpy().astype(int),
+        "precipitation": np.round(hourly.Variables(3).ValuesAsNumpy().astype("float64"), 2)
     }
     hourly_dataframe = pd.DataFrame(data=hourly_data)
     daily = response.Daily()
-    daily_weather_code = daily.Variables(0).ValuesAsNumpy().astype(int)
-    daily_datetime_dataframe = pd.DataFrame({"datetime": pd.date_range(
-        start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-        end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-        freq=pd.Timedelta(seconds=daily.Interval()),
-        inclusive="left"
-    )})
     daily_data = {
-        "date": pd.to_datetime(daily_datetime_dataframe["datetime"]).dt.date,
-        "weather_code": daily_weather_code
+        "date": get_datetimes(daily).date,
+        "weather_code": daily.Variables(0).ValuesAsNumpy().astype(int)
     }
     daily_dataframe = pd.DataFrame(data=daily_data)
     return daily_dataframe, hourly_dataframe
@@ -88,98 +118,81 @@ def delete_anomalies(daily_dataframe, hourly_dataframe):
     Responses from Open-Meteo sometimes contain one date that only has 1 hourly data
     point. This is not useful and is subsequently removed.
     """
-    dates = daily_dataframe["date"].tolist()
-    for date in dates:
-        hourly_series = hourly_dataframe.loc[hourly_dataframe["date"] == date]
-        if hourly_series.size < 24:
-            hourly_dataframe = hourly_dataframe[hourly_dataframe.date != date]
-            daily_dataframe = daily_dataframe[daily_dataframe.date != date]
+    hourly_counts = hourly_dataframe["date"].value_counts()
+    daily_counts = daily_dataframe["date"].map(hourly_counts).fillna(0)
+    incomplete_dates = daily_dataframe["date"][daily_counts < 24]
+    daily_dataframe = daily_dataframe[daily_counts >= 24]
+    hourly_dataframe = hourly_dataframe[~hourly_dataframe["date"].isin(incomplete_dates)]
     return daily_dataframe, hourly_dataframe
 
 
-def get_description(wmo_codes, code):
-    """Converts wmo codes to their corresponding string description."""
-    try:
-        description = wmo_codes["codes"][code]
-    except KeyError:
-        scheduler.app.logger.debug(f"Weather code '{code}' is unknown")
-        description = "Unknown"
-    return description
-
-
 def insert_descriptions(daily_dataframe):
     """Inserts descriptions for wmo codes into daily dataframes."""
-    vfunc = np.vectorize(get_description)
-    base_path = os.path.abspath(os.path.dirname(__file__))
-    file_path = os.path.join(base_path, "wmo_codes.yaml")
-    with open(file_path, "r") as file:
-        data = yaml.safe_load(file)
-    daily_dataframe["weather_description"] = vfunc(data, daily_dataframe["weather_code"])
+    codes = daily_dataframe["weather_code"].to_numpy()
+    known = (codes >= 0) & (codes < WMO_DESCRIPTIONS.size)
+    descriptions = np.full(codes.size, "Unknown", dtype=object)
+    descriptions[known] = WMO_DESCRIPTIONS[codes[known]]
+    for code in np.unique(codes[descriptions == "Unknown"]):
+        scheduler.app.logger.debug(f"Weather code '{code}' is unknown")
+    daily_dataframe["weather_description"] = descriptions
     return daily_dataframe
 
 
-def get_suntimes(city, tz, date):
-    """Retrieves sunrise and sunset times for the given date."""
-    s = sun(city.observer, tzinfo=tz, date=date)
-    sunrise = s["sunrise"].time().replace(microsecond=0)
-    sunset = s["sunset"].time().replace(microsecond=0)
-    return sunrise, sunset
-
-
 def insert_suntimes(daily_dataframe):
     """Inserts sunrise and sunset times into daily dataframes."""
-    city = LocationInfo(scheduler.app.config["CITY"],
-                        scheduler.app.config["REGION"],
-                        scheduler.app.config["TIMEZONE"],
-                        scheduler.app.config["LATITUDE"],
-                        scheduler.app.config["LONGITUDE"])
-    tz = pytz.timezone(scheduler.app.config["TIMEZONE"])
-    vfunc = np.vectorize(get_suntimes)
-    daily_dataframe["sunrise"], daily_dataframe["sunset"] = vfunc(city, tz, daily_dataframe["date"])
+    suntimes = [get_suntimes(day, scheduler.app.config) for day in daily_dataframe["date"]]
+    daily_dataframe["sunrise"] = [sunrise for sunrise, _ in suntimes]
+    daily_dataframe["sunset"] = [sunset for _, sunset in suntimes]
     return daily_dataframe
 
 
-def add_daily_to_db(row, existing_dates):
-    """Adds rows from daily dataframes to the daily table."""
-    with scheduler.app.app_context():
-        if row["date"] not in existing_dates:
-            daily = Daily(date=row["date"],
-                          sunrise=row["sunrise"],
-                          sunset=row["sunset"],
-                          weather_code=row["weather_code"],
-                          weather_description=row["weather_description"])
-            db.session.add(daily)
-            db.session.commit()
-            return row["date"]
+def get_upsert(model, index_elements, columns):
+    """Returns an insert for the model that updates the given columns of conflicting rows."""
+    statement = sqlite_insert(model)
+    return statement.on_conflict_do_update(index_elements=index_elements,
+                                           set_={column: statement.excluded[column] for column in columns})
 
 
-def add_hourly_to_db(row, daily_id):
-    """Adds rows from hourly dataframes to the hourly table."""
-    with scheduler.app.app_context():
-        hourly = Hourly(daily_id=daily_id,
-                        time=row["time"],
-                        temperature=row["temperature"],
-                        humidity=row["humidity"],
-                        precipitation_probability=row["precipitation_probability"],
-                        precipitation=row["precipitation"])
-        db.session.add(hourly)
-        db.session.commit()
-        return row["time"]
+def insert_into_db(daily_dataframe, hourly_dataframe):
+    """Bulk upserts daily and hourly dataframes into their tables within one transaction.
 
+    Rows for dates that already exist are updated so the past days included in each
+    response replace the forecasts stored when they were first fetched, the rain
+    checks then read observed rainfall. Daily rows are upserted against the unique
+    date index and hourly rows against the unique daily id and time index, using
+    executemany style statements committed once.
 
-def insert_into_db(daily_dataframe, hourly_dataframe):
-    """Applies add to db functions to the daily and hourly dataframes/series."""
-    existing_dates = [row.date for row in Daily.query.all()]
-    daily_result = daily_dataframe.apply(add_daily_to_db, existing_dates=existing_dates, axis=1)
-    dates_added = daily_result.dropna().tolist()
-    daily_count = len(dates_added)
-    hourly_count = 0
-    for date in dates_added:
-        daily_id = Daily.query.filter(Daily.date == date).first().id
-        hourly_series = hourly_dataframe.loc[hourly_dataframe["date"] == date]
-        hourly_result = hourly_series.apply(add_hourly_to_db, daily_id=daily_id, axis=1)
-        hourly_count += hourly_result.size
-    return daily_count, hourly_count
+    Args:
+        daily_dataframe: Dataframe containing daily weather data.
+        hourly_dataframe: Dataframe containing hourly weather data.
+
+    Returns:
+        A tuple containing the number of daily and hourly rows added, rows that
+        were updated are not counted.
+    """
+    with scheduler.app.app_context():
+        if daily_dataframe.empty:
+            return 0, 0
+        dates = daily_dataframe["date"].tolist()
+        existing_ids = db.session.scalars(db.select(Daily.id).where(Daily.date.in_(dates))).all()
+        existing_hourly = db.session.scalar(db.select(db.func.count(Hourly.id))
+                                            .where(Hourly.daily_id.in_(existing_ids)))
+        daily_columns = ["sunrise", "sunset", "weather_code", "weather_description"]
+        daily_rows = daily_dataframe[["date", *daily_columns]].to_dict("records")
+        db.session.execute(get_upsert(Daily, ["date"], daily_columns), daily_rows)
+        daily_ids = dict(db.session.execute(db.select(Daily.date, Daily.id)
+                                            .where(Daily.date.in_(dates))).all())
+        hourly_columns = ["temperature", "humidity", "precipitation_probability", "precipitation"]
+        hourly_rows = hourly_dataframe[hourly_dataframe["date"].isin(dates)]
+        hourly_rows = hourly_rows.assign(daily_id=hourly_rows["date"].map(daily_ids))
+        hourly_rows = hourly_rows[["daily_id", "time", *hourly_columns]].to_dict("records")
+        if hourly_rows:
+            db.session.execute(get_upsert(Hourly, ["daily_id", "time"], hourly_columns), hourly_rows)
+        hourly_count = db.session.scalar(db.select(db.func.count(Hourly.id))
+                                         .where(Hourly.daily_id.in_(daily_ids.values()))) - existing_hourly
+        db.session.commit()
+        chart_cache.invalidate()
+    return len(daily_ids) - len(existing_ids), hourly_count
 
 
 def delete_old_records():
@@ -193,5 +206,6 @@ def delete_old_records():
                 delete_log.append(record.date.strftime("%d/%m/%y"))
                 db.session.delete(record)
             db.session.commit()
+            chart_cache.invalidate()
     scheduler.app.logger.debug(f"Deleted {delete_log} from database")
     return
@@ -6,7 +6,7 @@ class Daily(db.Model):
     """Model for daily table."""
     __bind_key__ = "weather"
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date)
+    date = db.Column(db.Date, index=True, unique=True)
     sunrise = db.Column(db.Time)
     sunset = db.Column(db.Time)
     weather_code = db.Column(db.Integer)
@@ -20,6 +20,7 @@ class Daily(db.Model):
 class Hourly(db.Model):
     """Model for hourly table."""
     __bind_key__ = "weather"
+    __table_args__ = (db.Index("ix_hourly_daily_id_time", "daily_id", "time", unique=True),)
     id = db.Column(db.Integer, primary_key=True)
     daily_id = db.Column(db.Integer, db.ForeignKey("daily.id"))
     time = db.Column(db.Time)
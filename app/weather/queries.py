@@ -0,0 +1,24 @@
+"""Queries used by other modules to read from the local weather store."""
+from app.weather.models import Daily, Hourly
+from app import db
+
+
+def get_precipitation_sums(start_date, end_date):
+    """Retrieves total precipitation for each stored date between the given dates.
+
+    Sums are calculated with a single aggregate query, dates without a complete
+    set of 24 hourly records are excluded so they can be requested elsewhere.
+
+    Args:
+        start_date: First date to include.
+        end_date: Last date to include.
+
+    Returns:
+        A dictionary of dates mapped to their total precipitation in millimetres.
+    """
+    rows = db.session.execute(db.select(Daily.date, db.func.sum(Hourly.precipitation))
+                              .join(Hourly, Hourly.daily_id == Daily.id)
+                              .where(Daily.date.between(start_date, end_date))
+                              .group_by(Daily.id)
+                              .having(db.func.count(Hourly.id) >= 24)).all()
+    return {date: rain_sum or 0 for date, rain_sum in rows}
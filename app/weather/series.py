@@ -0,0 +1,67 @@
+"""Compact columnar weather series for ranges of dates."""
+import numpy as np
+from app.weather.models import Daily, Hourly
+from app import db
+
+SERIES = ["temperature", "humidity", "precipitation_probability", "precipitation"]
+
+
+def get_timestamp():
+    """Returns an expression calculating seconds since the epoch for hourly records."""
+    return db.cast(db.func.strftime("%s", db.func.printf("%s %s",
+                                                         Daily.date,
+                                                         db.func.substr(Hourly.time, 1, 8))),
+                   db.Integer)
+
+
+def get_arrays(start_date, end_date, names):
+    """Retrieves the given hourly columns between the given dates as arrays.
+
+    Args:
+        start_date: First date to include.
+        end_date: Last date to include.
+        names: Names of the hourly columns to include.
+
+    Returns:
+        An array of seconds since the epoch and a two dimensional array with a column for each name.
+    """
+    rows = db.session.execute(db.select(get_timestamp(), *[getattr(Hourly, name) for name in names])
+                              .join(Daily, Hourly.daily_id == Daily.id)
+                              .where(Daily.date.between(start_date, end_date))
+                              .order_by(Daily.date, Hourly.time)).all()
+    data = np.array(rows, dtype="float64").reshape(-1, len(names) + 1)
+    return data[:, 0].astype("int64"), np.nan_to_num(data[:, 1:])
+
+
+def get_series(start_date, end_date, max_points):
+    """Retrieves hourly data between the given dates as compact columnar arrays.
+
+    Rows are read with get_arrays so no ORM objects are created, missing values
+    are returned as zero. Times are delta encoded, the first value is seconds since
+    the epoch and each following value the seconds since the previous point. When
+    there are more points than max_points each series is reduced to the minimum
+    and maximum of equally sized buckets.
+
+    Args:
+        start_date: First date to include.
+        end_date: Last date to include.
+        max_points: Maximum number of points to return for each series.
+
+    Returns:
+        A dictionary containing the time array and each series.
+    """
+    times, values = get_arrays(start_date, end_date, SERIES)
+    downsampled = times.size > max_points
+    if downsampled:
+        starts = np.linspace(0, times.size, num=max_points // 2, endpoint=False).astype("int64")
+        starts = np.unique(starts)
+        times = times[starts]
+        minimums = np.round(np.minimum.reduceat(values, starts, axis=0), 2)
+        maximums = np.round(np.maximum.reduceat(values, starts, axis=0), 2)
+        series = {name: {"min": minimums[:, i].tolist(), "max": maximums[:, i].tolist()}
+                  for i, name in enumerate(SERIES)}
+    else:
+        values = np.round(values, 2)
+        series = {name: values[:, i].tolist() for i, name in enumerate(SERIES)}
+    time = np.diff(times, prepend=0).tolist()
+    return {"downsampled": bool(downsampled), "time": time, "series": series}
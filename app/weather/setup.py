@@ -0,0 +1,52 @@
+"""Functions that are required to execute on startup for the weather module."""
+from app.weather.models import Daily, Hourly
+from app import db
+
+
+def remove_duplicate_days():
+    """Deletes daily records, and their hourly records, that share a date with an older record.
+
+    Required before the unique index on dates can be created for databases that
+    predate it.
+
+    Run this function on startup.
+    """
+    first_ids = db.select(db.func.min(Daily.id)).group_by(Daily.date)
+    duplicate_ids = db.session.scalars(db.select(Daily.id).where(Daily.id.not_in(first_ids))).all()
+    if duplicate_ids:
+        db.session.execute(db.delete(Hourly).where(Hourly.daily_id.in_(duplicate_ids)))
+        db.session.execute(db.delete(Daily).where(Daily.id.in_(duplicate_ids)))
+        db.session.commit()
+    return
+
+
+def remove_duplicate_hours():
+    """Deletes hourly records that share a daily id and time with an older record.
+
+    The index on daily id and time was not unique in databases that predate
+    upserts, any such index is dropped once duplicates are removed so that
+    init_indexes creates it again as unique.
+
+    Run this function on startup before init_indexes.
+    """
+    engine = db.engines["weather"]
+    indexes = {index["name"]: index for index in db.inspect(engine).get_indexes("hourly")}
+    index = indexes.get("ix_hourly_daily_id_time")
+    if index is None or index["unique"]:
+        return
+    first_ids = db.select(db.func.min(Hourly.id)).group_by(Hourly.daily_id, Hourly.time)
+    db.session.execute(db.delete(Hourly).where(Hourly.id.not_in(first_ids)))
+    db.session.commit()
+    with engine.begin() as connection:
+        connection.execute(db.text("DROP INDEX ix_hourly_daily_id_time"))
+    return
+
+
+def init_jobs():
+    """Adds weather jobs to the scheduler.
+
+    Run this function on startup.
+    """
+    from app.weather.jobs import schedule_weather
+    schedule_weather()
+    return
@@ -1,9 +1,10 @@
 """Routes for the weather module."""
 from datetime import datetime
-from flask import render_template, flash, redirect, url_for, current_app
+from flask import render_template, flash, redirect, url_for, current_app, request, jsonify, abort
 from flask_login import login_required, current_user
-from app.weather.models import Daily, Hourly
-from app.weather import weather_bp, jobs
+from app.weather.models import Daily
+from app.weather.charts import chart_cache
+from app.weather import weather_bp
 
 
 @weather_bp.route("/", methods=["GET"])
@@ -27,6 +28,7 @@ def index():
 @weather_bp.route("/request-weather", methods=["GET"])
 @login_required
 def request_weather():
+    from app.weather import jobs
     daily_count, hourly_count = jobs.get_weather()
     msg = f"Added {daily_count} / {hourly_count} New Records"
     flash(msg, category="info")
@@ -36,19 +38,21 @@ def request_weather():
 @weather_bp.route("/<int:daily_id>", methods=["GET"])
 @login_required
 def graph(daily_id):
-    """Handles daily weather charts and requests for weather data."""
-    daily_available = Daily.query.order_by(Daily.date).all()
-    if daily_id in [record.id for record in daily_available]:
-        daily_data = Daily.query.filter(Daily.id == daily_id).first()
-        hourly_data = get_formatted_hourly(daily_id)
+    """Handles daily weather charts and requests for weather data.
+
+    Charts are rendered from payloads held in the chart cache.
+    """
+    daily_available = chart_cache.get_available()
+    chart = chart_cache.get_chart(daily_id)
+    if chart:
         return render_template("weather/weather.html",
                                render=True,
                                user=current_user,
                                daily_available=daily_available,
                                city=current_app.config["CITY"],
                                region=current_app.config["REGION"],
-                               daily_data=daily_data,
-                               hourly_data=hourly_data)
+                               daily_data=chart["daily"],
+                               hourly_data=chart["hourly"])
     else:
         return render_template("weather/weather.html",
                                render=False,
@@ -56,23 +60,23 @@ def graph(daily_id):
                                daily_available=daily_available)
 
 
-def get_formatted_hourly(daily_id):
-    """Retieves and formats all hourly data for the given daily id."""
-    hourly = Hourly.query.filter(Hourly.daily_id == daily_id).order_by(Hourly.time).all()
-    data = {
-        "time": [],
-        "temperature": [],
-        "humidity": [],
-        "precipitation_probability": [],
-        "precipitation": []
-    }
-    for record in hourly:
-        data["time"].append(f"{record.time.strftime('%H:%M')}")
-        data["temperature"].append(record.temperature)
-        data["humidity"].append(record.humidity)
-        data["precipitation_probability"].append(record.precipitation_probability)
-        data["precipitation"].append(record.precipitation)
-    return data
+@weather_bp.route("/series", methods=["GET"])
+@login_required
+def series():
+    """Returns hourly weather data for a range of dates as json.
+
+    Accepts optional start and end dates formatted as YYYY-MM-DD and the
+    maximum number of points to return, long ranges are downsampled.
+    """
+    try:
+        start_date = datetime.strptime(request.args.get("start", "0001-01-01"), "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.args.get("end", "9999-12-31"), "%Y-%m-%d").date()
+        max_points = int(request.args.get("points", current_app.config["SERIES_MAX_POINTS"]))
+    except ValueError:
+        abort(400)
+    max_points = min(max(max_points, 2), current_app.config["SERIES_MAX_POINTS"])
+    from app.weather.series import get_series
+    return jsonify(get_series(start_date, end_date, max_points))
 
 
 @weather_bp.context_processor
@@ -0,0 +1,48 @@
+"""Compares the original chart queries with the chart cache.
+
+The original route loaded every daily record as objects, then the selected
+daily record and its hourly records, formatting them on each request.
+
+Run with python -m benchmarks.charts
+"""
+import tempfile
+from app.weather.charts import ChartCache
+from app.weather.jobs import insert_into_db
+from app.weather.models import Daily, Hourly
+from app import db
+from benchmarks.common import create_app, measure, report
+from benchmarks.ingest import get_dataframes, clear
+
+
+def get_chart_original(daily_id):
+    daily_available = Daily.query.order_by(Daily.date).all()
+    if daily_id not in [record.id for record in daily_available]:
+        return None
+    daily_data = Daily.query.filter(Daily.id == daily_id).first()
+    data = {"time": [], "temperature": [], "humidity": [], "precipitation_probability": [], "precipitation": []}
+    for record in Hourly.query.filter(Hourly.daily_id == daily_id).order_by(Hourly.time).all():
+        data["time"].append(f"{record.time.strftime('%H:%M')}")
+        data["temperature"].append(record.temperature)
+        data["humidity"].append(record.humidity)
+        data["precipitation_probability"].append(record.precipitation_probability)
+        data["precipitation"].append(record.precipitation)
+    return daily_available, daily_data, data
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory)
+        with app.app_context():
+            for days in (10, 100, 1000):
+                clear()
+                insert_into_db(*get_dataframes(days))
+                daily_id = db.session.scalar(db.select(db.func.max(Daily.id)))
+                cache = ChartCache()
+                report(f"original {days} days", measure(lambda: get_chart_original(daily_id)))
+                report(f"cache cold {days} days", measure(lambda: (cache.clear(), cache.get_available(), cache.get_chart(daily_id))))
+                report(f"cache warm {days} days", measure(lambda: (cache.get_available(), cache.get_chart(daily_id))))
+                db.session.remove()
+
+
+if __name__ == "__main__":
+    main()
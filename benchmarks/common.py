@@ -0,0 +1,75 @@
+"""Helpers shared by the benchmarks.
+
+Benchmarks are standalone scripts run from the repository root, for example
+python -m benchmarks.ingest. Each creates its own databases in a temporary
+directory so the application databases are never touched.
+"""
+import time
+import statistics
+from datetime import datetime
+from flask import Flask
+from app.core.config import Config
+from app.auth.models import User  # noqa: F401
+from app.weather.models import Daily, Hourly  # noqa: F401
+from app.water.models import System, Plant, History, Config as PlantConfig, Usage  # noqa: F401
+from app.core.storage import init_storage
+from app import db, scheduler
+
+
+def create_app(directory, **config):
+    """Returns an application with empty databases in the given directory.
+
+    Only the databases are initialised, hardware and scheduler jobs are not
+    started. Keyword arguments override the applications config.
+    """
+    app = Flask("app")
+    app.config.from_object(Config)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{directory}/default.db",
+        SQLALCHEMY_BINDS={name: f"sqlite:///{directory}/{name}.db" for name in ("users", "weather", "water")},
+        USER_CACHE_STAMP=f"{directory}/users.stamp",
+        CHART_CACHE_STAMP=f"{directory}/charts.stamp",
+        WATER_NAVIGATION_STAMP=f"{directory}/navigation.stamp",
+        HISTORY_ARCHIVE_DIR=f"{directory}/archive",
+        **config
+    )
+    db.init_app(app)
+    init_storage(app)
+    scheduler.app = app
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def add_plant(name, system_name, duration_sec=120):
+    """Adds a plant with a disabled config assigned to a new system and returns its id."""
+    plant = Plant(name=name,
+                  status=False,
+                  system=System(name=system_name),
+                  config=PlantConfig(enabled=False,
+                                     duration_sec=duration_sec,
+                                     occurrence_days=1,
+                                     mode=3,
+                                     default=datetime(2000, 1, 1, 6).time(),
+                                     rain_reset=False,
+                                     threshold_mm=1,
+                                     et_adjust=False,
+                                     last_edit=datetime.now().replace(microsecond=0)))
+    db.session.add(plant)
+    db.session.commit()
+    return plant.id
+
+
+def measure(func, repeat=5):
+    """Calls func repeat times and returns the elapsed seconds of each call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times, unit=1e3, suffix="ms"):
+    """Prints the median and minimum of the given times."""
+    print(f"{name:<48} median {statistics.median(times) * unit:10.3f}{suffix}  min {min(times) * unit:10.3f}{suffix}")
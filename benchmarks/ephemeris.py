@@ -0,0 +1,31 @@
+"""Compares calculating sun times per call with the precomputed tables.
+
+Run with python -m benchmarks.ephemeris
+"""
+from datetime import date, timedelta
+import pytz
+from astral import LocationInfo
+from astral.sun import sun
+from app.core.config import Config
+from app.core.ephemeris import get_suntimes, get_table
+from benchmarks.common import measure, report
+
+
+def get_suntimes_per_call(day, config):
+    city = LocationInfo(config["CITY"], config["REGION"], config["TIMEZONE"], config["LATITUDE"], config["LONGITUDE"])
+    s = sun(city.observer, tzinfo=pytz.timezone(config["TIMEZONE"]), date=day)
+    return s["sunrise"].time().replace(microsecond=0), s["sunset"].time().replace(microsecond=0)
+
+
+def main():
+    config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    for days in (10, 100, 1000):
+        dates = [date(2024, 1, 1) + timedelta(days=i % 366) for i in range(days)]
+        report(f"per call {days} dates", measure(lambda: [get_suntimes_per_call(day, config) for day in dates]))
+        get_table.cache_clear()
+        report(f"tables cold {days} dates", measure(lambda: [get_suntimes(day, config) for day in dates], repeat=1))
+        report(f"tables warm {days} dates", measure(lambda: [get_suntimes(day, config) for day in dates]))
+
+
+if __name__ == "__main__":
+    main()
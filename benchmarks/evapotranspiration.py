@@ -0,0 +1,45 @@
+"""Compares sizing watering durations per plant with the single batch pass.
+
+Ten days of hourly records are stored, as held by the weather database. The
+per plant path calls get_durations for each config on its own, reading the
+hourly records once per plant, the batch path sizes every config in one call.
+
+Run with python -m benchmarks.evapotranspiration
+"""
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.water.evapotranspiration import get_durations
+from app.weather.jobs import insert_into_db
+from benchmarks.common import create_app, measure, report
+from benchmarks.ingest import get_dataframes
+
+DAYS = 10
+
+
+def get_configs(count):
+    """Returns configs with windows of one to three days spread over the stored records."""
+    start = datetime(2000, 1, 1)
+    return [SimpleNamespace(plant_id=index,
+                            duration_sec=120,
+                            job_init=start + timedelta(hours=index % 96),
+                            job_due=start + timedelta(hours=index % 96, days=1 + index % 3))
+            for index in range(count)]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory)
+        with app.app_context():
+            insert_into_db(*get_dataframes(DAYS))
+            for count in (10, 100, 1000):
+                configs = get_configs(count)
+                assert get_durations(configs, app.config) == {config.plant_id: get_durations([config], app.config)[config.plant_id]
+                                                              for config in configs}
+                report(f"{count} plants per plant",
+                       measure(lambda: [get_durations([config], app.config) for config in configs], repeat=3))
+                report(f"{count} plants batch", measure(lambda: get_durations(configs, app.config)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compares per-row inserts with the bulk upsert used by insert_into_db.
+
+The per-row path reproduces the original ingestion, one add and commit per
+daily and hourly row. Each size is inserted into empty databases.
+
+Run with python -m benchmarks.ingest
+"""
+import tempfile
+from datetime import date, time, timedelta
+import pandas as pd
+from app.weather.jobs import insert_into_db
+from app.weather.models import Daily, Hourly
+from app import db
+from benchmarks.common import create_app, measure, report
+
+
+def get_dataframes(days):
+    """Returns daily and hourly dataframes covering the given number of days."""
+    dates = [date(2000, 1, 1) + timedelta(days=i) for i in range(days)]
+    daily = pd.DataFrame({"date": dates,
+                          "sunrise": time(6),
+                          "sunset": time(20),
+                          "weather_code": 3,
+                          "weather_description": "Overcast"})
+    hourly = pd.DataFrame({"date": [day for day in dates for _ in range(24)],
+                           "time": [time(hour) for _ in dates for hour in range(24)],
+                           "temperature": 12.5,
+                           "humidity": 80,
+                           "precipitation_probability": 10,
+                           "precipitation": 0.1})
+    return daily, hourly
+
+
+def insert_per_row(daily_dataframe, hourly_dataframe):
+    """Inserts each row with its own commit as the original ingestion did."""
+    for row in daily_dataframe.to_dict("records"):
+        daily = Daily(**row)
+        db.session.add(daily)
+        db.session.commit()
+        for hourly_row in hourly_dataframe[hourly_dataframe["date"] == row["date"]].to_dict("records"):
+            del hourly_row["date"]
+            db.session.add(Hourly(daily_id=daily.id, **hourly_row))
+            db.session.commit()
+
+
+def clear():
+    db.session.execute(db.delete(Hourly))
+    db.session.execute(db.delete(Daily))
+    db.session.commit()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory)
+        with app.app_context():
+            for days in (10, 100, 1000):
+                daily, hourly = get_dataframes(days)
+                repeat = 1 if days == 1000 else 3
+                for name, insert in (("per row", insert_per_row), ("bulk", insert_into_db)):
+                    times = []
+                    for _ in range(repeat):
+                        clear()
+                        times += measure(lambda: insert(daily, hourly), repeat=1)
+                    report(f"{name} {days} days ({days * 25} rows)", times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark of application startup with create_app.
+
+Each boot runs in a fresh interpreter so imports and the scheduler start from
+nothing, as they do for a web worker or the daemon. Databases, stamp files, and
+logs are kept in a temporary directory and the simulated GPIO backend is used.
+The first boot creates the databases, later boots open the existing ones.
+Measures how long create_app takes to return, until the hardware is ready, and
+the phases recorded by the startup timer.
+
+Run with python -m benchmarks.startup
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+BOOTS = 5
+
+
+def boot(directory):
+    """Creates the application within the given directory and prints its timings as json."""
+    start = time.perf_counter()
+    os.chdir(directory)
+    from app.core.config import Config
+    Config.GPIO_BACKEND = "simulated"
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{directory}/default.db"
+    Config.SQLALCHEMY_BINDS = {name: f"sqlite:///{directory}/{name}.db" for name in ("users", "weather", "water")}
+    Config.SCHEDULER_JOBSTORES = {"default": {"type": "sqlalchemy", "url": Config.SQLALCHEMY_DATABASE_URI}}
+    Config.USER_CACHE_STAMP = f"{directory}/users.stamp"
+    Config.CHART_CACHE_STAMP = f"{directory}/charts.stamp"
+    Config.WATER_NAVIGATION_STAMP = f"{directory}/navigation.stamp"
+    Config.HISTORY_ARCHIVE_DIR = f"{directory}/archive"
+    Config.OPENMETEO_CACHE_DIR = f"{directory}/cache"
+    Config.DAEMON_SOCKET = None
+    from app import create_app, hardware_ready
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    hardware_ready.wait(60)
+    ready = time.perf_counter()
+    print(json.dumps({"import": imported - start,
+                      "create_app": created - imported,
+                      "hardware_ready": ready - imported,
+                      "phases": app.extensions["startup_timer"].phases}))
+    sys.stdout.flush()
+    # The scheduler is left running, exits without waiting for its jobs.
+    os._exit(0)
+
+
+def main():
+    # Imported here so the application is not imported before each boot is timed.
+    from benchmarks.common import report
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(BOOTS):
+            output = subprocess.run([sys.executable, "-m", "benchmarks.startup", directory],
+                                    capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    cold, warm = results[0], results[1:]
+    print(f"first boot: import {cold['import'] * 1e3:.0f}ms, create_app {cold['create_app'] * 1e3:.0f}ms, "
+          f"hardware ready {cold['hardware_ready'] * 1e3:.0f}ms")
+    report("app imports", [result["import"] for result in warm])
+    report("create_app()", [result["create_app"] for result in warm])
+    report("create_app() until hardware ready", [result["hardware_ready"] for result in warm])
+    for index, (name, _) in enumerate(warm[0]["phases"]):
+        report(f"  phase {name}", [result["phases"][index][1] for result in warm])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        boot(sys.argv[1])
+    else:
+        main()
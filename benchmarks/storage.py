@@ -0,0 +1,58 @@
+"""Compares SQLite defaults with the pragmas set by init_storage.
+
+Measures the latency of small commits, such as a history row written when a
+watering run starts, and of reads made while another thread is committing.
+
+Run with python -m benchmarks.storage
+"""
+import tempfile
+import threading
+from datetime import datetime
+from app.water.models import History
+from app import db
+from benchmarks.common import create_app, measure, report
+
+COMMITS = 500
+
+
+def commit_history():
+    db.session.add(History(plant_id=1, start_date_time=datetime.now(), duration_sec=60))
+    db.session.commit()
+
+
+def read_history():
+    db.session.execute(db.select(db.func.count(History.id))).scalar()
+    db.session.rollback()
+
+
+def main():
+    for name, pragmas in (("defaults", {"SQLITE_PRAGMAS": {}, "SQLITE_BIND_PRAGMAS": {}}), ("tuned", {})):
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app(directory, **pragmas)
+            with app.app_context():
+                report(f"{name} commit", measure(commit_history, repeat=COMMITS))
+            stopped = threading.Event()
+            errors = []
+
+            def write():
+                with app.app_context():
+                    while not stopped.is_set():
+                        try:
+                            commit_history()
+                        except Exception as e:
+                            errors.append(e)
+                            db.session.rollback()
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            try:
+                with app.app_context():
+                    report(f"{name} read during writes", measure(read_history, repeat=COMMITS))
+            finally:
+                stopped.set()
+                writer.join()
+            print(f"{name} writer errors: {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compares the original per-date transform with the vectorised one.
+
+The original removed incomplete dates with a loop over each date and looked up
+descriptions with np.vectorize, reloading wmo_codes.yaml on every call.
+
+Run with python -m benchmarks.transform
+"""
+import os
+import tempfile
+from datetime import date, time, timedelta
+import yaml
+import numpy as np
+import pandas as pd
+from app.weather import jobs
+from app.weather.jobs import delete_anomalies, insert_descriptions
+from benchmarks.common import create_app, measure, report
+
+
+def get_dataframes(days):
+    """Returns dataframes covering the given number of days, the last with a single hour."""
+    dates = [date(2000, 1, 1) + timedelta(days=i) for i in range(days)]
+    daily = pd.DataFrame({"date": dates, "weather_code": np.resize([0, 3, 45, 61, 95], days)})
+    hourly = pd.DataFrame({"date": [day for day in dates[:-1] for _ in range(24)] + [dates[-1]],
+                           "time": [time(hour) for _ in dates[:-1] for hour in range(24)] + [time(0)]})
+    return daily, hourly
+
+
+def delete_anomalies_per_date(daily_dataframe, hourly_dataframe):
+    for day in daily_dataframe["date"].tolist():
+        if hourly_dataframe.loc[hourly_dataframe["date"] == day].size < 24:
+            hourly_dataframe = hourly_dataframe[hourly_dataframe.date != day]
+            daily_dataframe = daily_dataframe[daily_dataframe.date != day]
+    return daily_dataframe, hourly_dataframe
+
+
+def get_description(wmo_codes, code):
+    return wmo_codes["codes"].get(code, "Unknown")
+
+
+def insert_descriptions_vectorize(daily_dataframe):
+    file_path = os.path.join(os.path.dirname(jobs.__file__), "wmo_codes.yaml")
+    with open(file_path, "r") as file:
+        data = yaml.safe_load(file)
+    daily_dataframe["weather_description"] = np.vectorize(get_description)(data, daily_dataframe["weather_code"])
+    return daily_dataframe
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory)
+        with app.app_context():
+            for days in (10, 100, 1000):
+                daily, hourly = get_dataframes(days)
+                report(f"delete anomalies per date {days} days", measure(lambda: delete_anomalies_per_date(daily, hourly)))
+                report(f"delete anomalies vectorised {days} days", measure(lambda: delete_anomalies(daily, hourly)))
+                report(f"descriptions np.vectorize {days} days", measure(lambda: insert_descriptions_vectorize(daily.copy())))
+                report(f"descriptions vectorised {days} days", measure(lambda: insert_descriptions(daily.copy())))
+
+
+if __name__ == "__main__":
+    main()
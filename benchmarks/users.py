@@ -0,0 +1,53 @@
+"""Compares authenticated request throughput with and without the user cache.
+
+The original user loader read the user from the users database on every
+authenticated request. Requests are made with the test client to a route
+protected by login_required that returns an empty response, so the time is
+dominated by loading the user.
+
+Run with python -m benchmarks.users
+"""
+import tempfile
+from flask_login import LoginManager, login_required
+from app.auth.cache import user_cache
+from app.auth.models import User
+from app import db
+from benchmarks.common import create_app, measure, report
+
+REQUESTS = 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory, SECRET_KEY="benchmark")
+        login_manager = LoginManager(app)
+        loaders = {
+            "original": lambda id: db.session.get(User, int(id)),
+            "cached": lambda id: user_cache.get(int(id), app.config)
+        }
+        loader = {"load": None}
+        login_manager.user_loader(lambda id: loader["load"](id))
+
+        @app.route("/")
+        @login_required
+        def index():
+            return ""
+
+        with app.app_context():
+            user = User(username="admin", password="")
+            db.session.add(user)
+            db.session.commit()
+            user_id = str(user.id)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = user_id
+        for name, load in loaders.items():
+            loader["load"] = load
+            assert client.get("/").status_code == 200
+            times = measure(lambda: [client.get("/") for _ in range(REQUESTS)])
+            report(f"{name} loader, {REQUESTS} requests", times)
+            print(f"{'':<48} {REQUESTS / min(times):10.0f} requests per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""End-to-end benchmark of watering runs on the simulated GPIO backend.
+
+Each zone is a simulated valve with its own relay and switch, all zones share
+one pump on the main supply. Measures how long process() takes to return, the
+overhead of a run beyond its duration, and the window and pump starts of a
+dispatch of every zone compared with the plan.
+
+Run with python -m benchmarks.watering
+"""
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from app.water.gpio import GPIO, SimulatedGPIO
+from app.water.valve import Valve
+from app.water.pump import Pump
+from app.water.actuator import Actuator
+from app.water.dispatcher import get_dispatcher
+from app.water.planner import plan, simulate
+from app.water.models import Config
+from app.water import jobs
+from app import db, actuators, hardware_ready
+from benchmarks.common import create_app, add_plant, measure, report
+
+ZONES = 12
+DURATION_SEC = 1
+
+
+class Zone(Valve, Pump):
+    """Valve and shared pump switched in the same order as ValvePump with a shorter wait."""
+
+    def __init__(self, index):
+        Valve.__init__(self, 100 + index * 2, 101 + index * 2, settle_sec=0.05, timeout_sec=2)
+        Pump.__init__(self, 16, hold_sec=1, supply="main")
+        self.wait = 0.05
+
+    def on(self):
+        Valve.on(self)
+        time.sleep(self.wait)
+        Pump.on(self)
+
+    def off(self):
+        Valve.off(self)
+        time.sleep(self.wait)
+        Pump.off(self)
+
+
+def wait_idle(dispatcher):
+    while dispatcher.pending or dispatcher.running:
+        time.sleep(0.01)
+
+
+def main():
+    names = [f"Zone{index}" for index in range(ZONES)]
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(directory,
+                         WATER_CONCURRENCY_LIMIT=4,
+                         WATER_SYSTEM_SUPPLY={name: ("main", 1) for name in names},
+                         WATER_SUPPLY_CAPACITY={"main": 2})
+        GPIO.select(SimulatedGPIO(wiring={100 + index * 2: 101 + index * 2 for index in range(ZONES)}))
+        dispatcher = get_dispatcher(app.config)
+        Pump.queued = dispatcher.has_pending
+        with app.app_context():
+            plant_ids = []
+            for index, name in enumerate(names):
+                zone = Zone(index)
+                zone.off()
+                actuators[name] = Actuator(name, zone)
+                plant_ids.append(add_plant(f"Plant {index}", name, DURATION_SEC))
+            hardware_ready.set()
+
+            done = threading.Event()
+            latencies = []
+            totals = []
+            for _ in range(5):
+                done.clear()
+                start = time.perf_counter()
+                latencies += measure(lambda: jobs.process(DURATION_SEC, plant_ids[0], callback=done.set), repeat=1)
+                done.wait()
+                totals.append(time.perf_counter() - start - DURATION_SEC)
+            report("process() return", latencies)
+            report("run overhead beyond duration", totals)
+
+            runs = [(plant_id, name, DURATION_SEC) for plant_id, name in zip(plant_ids, names)]
+            window_sec, planned_starts = simulate(plan(runs, app.config), app.config, app.config["WATER_CONCURRENCY_LIMIT"])
+            db.session.execute(db.update(Config).values(enabled=True, job_due=datetime.now() - timedelta(seconds=1)))
+            db.session.commit()
+            pump_starts = Pump.relays[16]["starts"]
+            start = time.perf_counter()
+            jobs.dispatch()
+            wait_idle(dispatcher)
+            elapsed = time.perf_counter() - start
+            print(f"dispatch of {ZONES} zones: window {elapsed:.2f}s (planned {window_sec}s), "
+                  f"pump starts {Pump.relays[16]['starts'] - pump_starts} (planned {planned_starts['main']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Executes the scheduler and actuator daemon.
+
+Used instead of running the scheduler within the web server so gunicorn can
+run multiple workers. SECRET_KEY and DAEMON_SOCKET must be set in the
+environment of both the daemon and the web server.
+"""
+import os
+import logging
+from app import create_app
+from app.core.ipc import serve
+
+if __name__ == "__main__":
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    logsdir = os.path.join(basedir, "logs")
+    if not os.path.exists(logsdir):
+        os.makedirs(logsdir)
+    os.environ["LOG_ROLE"] = "daemon"
+    app = create_app(daemon=True)
+    app.logger = logging.getLogger("production")
+    serve(app)
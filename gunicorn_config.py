@@ -1,2 +1,28 @@
-workers = 1
+import os
+
+# More than one worker requires the scheduler to run separately in daemon.py,
+# set DAEMON_SOCKET and SECRET_KEY in the environment of both.
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+# Each open status stream holds a thread for up to WATER_EVENTS_MAX_SEC, so
+# threaded workers are used to keep serving pages while streams are open.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
 bind = "0.0.0.0:8000"
+
+if workers > 1 and not (os.environ.get("DAEMON_SOCKET") and os.environ.get("SECRET_KEY")):
+    raise RuntimeError("GUNICORN_WORKERS above 1 requires DAEMON_SOCKET and SECRET_KEY to be set")
+
+
+def pre_fork(server, worker):
+    """Gives the worker the lowest log slot not held by a running worker.
+
+    Replacement workers take over the slot of the worker they replace, so each
+    log file has a single writer and the number of files stays fixed.
+    """
+    used = {getattr(other, "log_slot", None) for other in server.WORKERS.values()}
+    worker.log_slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+
+def post_fork(server, worker):
+    """Sets the role used in the log filename before the worker creates the application."""
+    os.environ["LOG_ROLE"] = f"web{worker.log_slot}"
@@ -0,0 +1,72 @@
+"""Fixtures shared by the tests."""
+import pytest
+
+
+@pytest.fixture
+def config():
+    """Returns the applications config as a dictionary."""
+    from app.core.config import Config
+    return {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Returns an application with empty databases and stamp files in a temporary directory.
+
+    Only the databases are initialised, hardware and scheduler jobs are not started.
+    """
+    from flask import Flask
+    from app.core.config import Config
+    from app.auth.models import User  # noqa: F401
+    from app.weather.models import Daily, Hourly  # noqa: F401
+    from app.water.models import System, Plant, History, Config as PlantConfig, Usage  # noqa: F401
+    from app import db, scheduler
+    application = Flask("app")
+    application.config.from_object(Config)
+    application.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'default.db'}",
+        SQLALCHEMY_BINDS={name: f"sqlite:///{tmp_path / name}.db" for name in ("users", "weather", "water")},
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        USER_CACHE_STAMP=str(tmp_path / "users.stamp"),
+        CHART_CACHE_STAMP=str(tmp_path / "charts.stamp"),
+        WATER_NAVIGATION_STAMP=str(tmp_path / "navigation.stamp")
+    )
+    db.init_app(application)
+    monkeypatch.setattr(scheduler, "app", application, raising=False)
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.session.remove()
+
+
+@pytest.fixture
+def ready(monkeypatch):
+    """Marks the hardware as ready for watering processes."""
+    import threading
+    from app.water import jobs
+    event = threading.Event()
+    event.set()
+    monkeypatch.setattr(jobs, "hardware_ready", event)
+    return event
+
+
+def add_plant(name, system_name, duration_sec=120):
+    """Adds a plant with a disabled config assigned to a new system and returns its id."""
+    from datetime import datetime, time
+    from app.water.models import System, Plant, Config
+    from app import db
+    plant = Plant(name=name,
+                  status=False,
+                  system=System(name=system_name),
+                  config=Config(enabled=False,
+                                duration_sec=duration_sec,
+                                occurrence_days=1,
+                                mode=3,
+                                default=time(6),
+                                rain_reset=False,
+                                threshold_mm=1,
+                                et_adjust=False,
+                                last_edit=datetime.now().replace(microsecond=0)))
+    db.session.add(plant)
+    db.session.commit()
+    return plant.id
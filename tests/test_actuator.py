@@ -0,0 +1,92 @@
+"""Tests for the threads executing commands for each system."""
+import threading
+import pytest
+from tests.conftest import add_plant
+
+
+class Recorder(object):
+    """System object recording the commands it receives."""
+
+    def __init__(self, fail=False):
+        self.actions = []
+        self.fail = fail
+
+    def on(self):
+        self.actions.append("on")
+        if self.fail:
+            raise TimeoutError("Switch did not settle")
+
+    def off(self):
+        self.actions.append("off")
+
+
+def run(actuator, duration_sec):
+    done = threading.Event()
+    results = []
+
+    def finished(elapsed, cancelled, failed):
+        results.append((elapsed, cancelled, failed))
+        done.set()
+
+    assert actuator.run_for(duration_sec, finished)
+    return done, results
+
+
+def test_run_for_finishes_after_duration(app):
+    from app.water.actuator import Actuator
+    recorder = Recorder()
+    actuator = Actuator("test", recorder)
+    done, results = run(actuator, 0.2)
+    assert done.wait(5)
+    elapsed, cancelled, failed = results[0]
+    assert elapsed == pytest.approx(0.2, abs=0.02)
+    assert (cancelled, failed) == (False, False)
+    assert recorder.actions == ["on", "off"]
+    assert not actuator.busy
+
+
+def test_cancel_stops_run_immediately(app):
+    import time
+    from app.water.actuator import Actuator
+    recorder = Recorder()
+    actuator = Actuator("test", recorder)
+    done, results = run(actuator, 60)
+    assert not actuator.run_for(60)
+    time.sleep(0.1)
+    cancelled_at = time.monotonic()
+    assert actuator.cancel()
+    assert done.wait(5)
+    assert time.monotonic() - cancelled_at < 0.05
+    elapsed, cancelled, failed = results[0]
+    assert elapsed == pytest.approx(0.1, abs=0.05)
+    assert (cancelled, failed) == (True, False)
+    assert recorder.actions == ["on", "off"]
+    assert not actuator.cancel()
+
+
+def test_failed_on_is_reported(app):
+    from app.water.actuator import Actuator
+    recorder = Recorder(fail=True)
+    actuator = Actuator("test", recorder)
+    done, results = run(actuator, 60)
+    assert done.wait(5)
+    assert results[0][1:] == (False, True)
+    assert recorder.actions == ["on", "off"]
+    assert not actuator.busy
+
+
+def test_process_does_not_record_failed_runs(app, ready, monkeypatch):
+    from app.water.actuator import Actuator
+    from app.water.events import get_bus
+    from app.water.jobs import process
+    from app.water.models import History, Usage
+    from app import db, actuators
+    monkeypatch.setitem(actuators, "Failing", Actuator("Failing", Recorder(fail=True)))
+    plant_id = add_plant("Fern", "Failing")
+    subscription = get_bus(app.config).subscribe()
+    done = threading.Event()
+    assert process(60, plant_id, callback=done.set)
+    assert done.wait(5)
+    assert db.session.scalar(db.select(db.func.count(History.id))) == 0
+    assert db.session.scalar(db.select(db.func.count(Usage.id))) == 0
+    assert [event["event"] for event in subscription.get(1)] == ["started", "failed"]
@@ -0,0 +1,48 @@
+"""Tests for the weather chart cache."""
+from datetime import date, time
+
+
+def add_day(day, temperature):
+    from app.weather.models import Daily, Hourly
+    from app import db
+    daily = Daily(date=day, sunrise=time(6), sunset=time(20), weather_code=0, weather_description="Clear Sky")
+    daily.hourly = [Hourly(time=time(hour), temperature=temperature, humidity=50,
+                           precipitation_probability=0, precipitation=0) for hour in range(24)]
+    db.session.add(daily)
+    db.session.commit()
+    return daily.id
+
+
+def test_get_chart_builds_and_caches_payloads(app):
+    from app.weather.charts import ChartCache
+    cache = ChartCache()
+    daily_id = add_day(date(2024, 6, 1), 10)
+    chart = cache.get_chart(daily_id)
+    assert chart["daily"]["date"] == date(2024, 6, 1)
+    assert chart["hourly"]["time"][:2] == ["00:00", "01:00"]
+    assert chart["hourly"]["temperature"] == [10] * 24
+    assert cache.get_chart(daily_id) is chart
+    assert cache.get_chart(daily_id + 1) is None
+
+
+def test_get_available_lists_dates_in_order(app):
+    from app.weather.charts import ChartCache
+    cache = ChartCache()
+    later = add_day(date(2024, 6, 2), 10)
+    earlier = add_day(date(2024, 6, 1), 10)
+    assert [tuple(row) for row in cache.get_available()] == [(earlier, date(2024, 6, 1)), (later, date(2024, 6, 2))]
+
+
+def test_invalidate_clears_other_caches(app):
+    from app.weather.charts import ChartCache
+    from app.weather.models import Hourly
+    from app import db
+    cache, other = ChartCache(), ChartCache()
+    daily_id = add_day(date(2024, 6, 1), 10)
+    other.get_available()
+    assert other.get_chart(daily_id)["hourly"]["temperature"] == [10] * 24
+    db.session.execute(db.update(Hourly).values(temperature=15))
+    db.session.commit()
+    cache.invalidate()
+    other.get_available()
+    assert other.get_chart(daily_id)["hourly"]["temperature"] == [15] * 24
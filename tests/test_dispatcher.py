@@ -0,0 +1,142 @@
+"""Tests for admitting watering runs within concurrency and supply limits."""
+import threading
+
+
+def test_drain_releases_runs_that_raise(app, monkeypatch):
+    from app.water import jobs
+    from app.water.dispatcher import Dispatcher
+
+    def process(duration_sec, plant_id, callback=None):
+        raise RuntimeError("hardware failure")
+
+    monkeypatch.setattr(jobs, "process", process)
+    dispatcher = Dispatcher(1, app.config)
+    dispatcher.submit(1, 10, "main", 1)
+    dispatcher.submit(2, 10, "main", 1)
+    assert dispatcher.pending == []
+    assert dispatcher.running == 0
+    assert dispatcher.used == {"main": 0}
+
+
+def test_drain_releases_runs_that_do_not_start(app, monkeypatch):
+    from app.water import jobs
+    from app.water.dispatcher import Dispatcher
+    started = []
+    monkeypatch.setattr(jobs, "process", lambda duration_sec, plant_id, callback=None: started.append(plant_id))
+    dispatcher = Dispatcher(1, app.config)
+    dispatcher.submit(1, 10, "main", 1)
+    assert started == [1]
+    assert dispatcher.running == 0
+    assert dispatcher.used == {"main": 0}
+
+
+def test_process_skips_deleted_plants(app, monkeypatch):
+    from app.water import jobs
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(jobs, "hardware_ready", ready)
+    assert jobs.process(10, 999) is False
+
+
+class Submitted(list):
+    """Records runs submitted to the dispatcher instead of starting them."""
+
+    def submit(self, plant_id, duration_sec, supply, flow):
+        self.append((plant_id, duration_sec))
+
+
+def enable_due(plant_ids, **config):
+    """Enables the given plants with a due date a second ago."""
+    from datetime import datetime, timedelta
+    from app.water.models import Config
+    from app import db
+    due = datetime.now().replace(microsecond=0) - timedelta(seconds=1)
+    db.session.execute(db.update(Config)
+                       .where(Config.plant_id.in_(plant_ids))
+                       .values(enabled=True, job_init=due - timedelta(days=1), job_due=due, **config))
+    db.session.commit()
+
+
+def test_dispatch_recovers_from_failed_lookups(app, ready, monkeypatch):
+    from datetime import datetime
+    from app.water import jobs
+    from app.water.models import Config
+    from app import db
+    from tests.conftest import add_plant
+
+    def fail(*args):
+        raise ConnectionError("lookup failed")
+
+    submitted = Submitted()
+    monkeypatch.setattr(jobs, "get_dispatcher", lambda config: submitted)
+    monkeypatch.setattr(jobs, "get_precipitation_sums", fail)
+    monkeypatch.setattr("app.water.evapotranspiration.get_durations", fail)
+    scheduled = []
+    monkeypatch.setattr(jobs, "schedule_dispatch", lambda: scheduled.append(True))
+    plant_ids = [add_plant("Fern", "A", 30), add_plant("Rose", "B", 45)]
+    enable_due(plant_ids[:1], rain_reset=True)
+    enable_due(plant_ids[1:], et_adjust=True)
+    jobs.dispatch()
+    assert sorted(submitted) == [(plant_ids[0], 30), (plant_ids[1], 45)]
+    assert scheduled == [True]
+    db.session.expire_all()
+    assert all(due > datetime.now() for due in db.session.scalars(db.select(Config.job_due)))
+
+
+def test_dispatch_advances_due_dates_when_planning_fails(app, ready, monkeypatch):
+    from datetime import datetime
+    import pytest
+    from app.water import jobs
+    from app.water.models import Config
+    from app import db
+    from tests.conftest import add_plant
+
+    def fail(runs, config):
+        raise RuntimeError("planning failed")
+
+    monkeypatch.setattr(jobs, "plan", fail)
+    scheduled = []
+    monkeypatch.setattr(jobs, "schedule_dispatch", lambda: scheduled.append(True))
+    enable_due([add_plant("Fern", "A")])
+    with pytest.raises(RuntimeError):
+        jobs.dispatch()
+    assert scheduled == [True]
+    db.session.expire_all()
+    assert db.session.scalar(db.select(Config.job_due)) > datetime.now()
+
+
+def test_dispatch_scales_to_many_plants(app, ready, monkeypatch):
+    import time
+    from datetime import datetime, time as clock
+    from app.water import jobs
+    from app.water.models import System, Plant, Config
+    from app import db
+    count = 5000
+    submitted = Submitted()
+    monkeypatch.setattr(jobs, "get_dispatcher", lambda config: submitted)
+    monkeypatch.setattr(jobs, "schedule_dispatch", lambda: None)
+    app.config["WATER_SYSTEM_SUPPLY"] = {f"System{index}": (f"supply{index % 4}", 1) for index in range(count)}
+    app.config["WATER_SUPPLY_CAPACITY"] = {f"supply{index}": 2 for index in range(4)}
+    now = datetime.now().replace(microsecond=0)
+    db.session.add_all(Plant(name=f"Plant {index}",
+                             status=False,
+                             system=System(name=f"System{index}"),
+                             config=Config(enabled=True,
+                                           duration_sec=60 + index % 120,
+                                           occurrence_days=1,
+                                           mode=3,
+                                           default=clock(6),
+                                           rain_reset=False,
+                                           threshold_mm=1,
+                                           et_adjust=False,
+                                           last_edit=now,
+                                           job_init=now,
+                                           job_due=now))
+                       for index in range(count))
+    db.session.commit()
+    start = time.perf_counter()
+    jobs.dispatch()
+    elapsed = time.perf_counter() - start
+    assert len(submitted) == count
+    assert db.session.scalar(db.select(db.func.count()).where(Config.job_due <= now)) == 0
+    assert elapsed < 10
@@ -0,0 +1,22 @@
+"""Tests for the precomputed sunrise and sunset tables."""
+from datetime import date, datetime
+
+
+def test_get_table_covers_every_date(config):
+    from app.core.ephemeris import get_location, get_table
+    location = get_location(config)
+    assert len(get_table(location, 2023)) == 365
+    assert len(get_table(location, 2024)) == 366
+    sunrise, sunset = get_table(location, 2024)[date(2024, 6, 21)]
+    assert sunrise < sunset
+
+
+def test_get_table_is_cached(config):
+    from app.core.ephemeris import get_location, get_table
+    location = get_location(config)
+    assert get_table(location, 2024) is get_table(location, 2024)
+
+
+def test_get_suntimes_accepts_datetimes(config):
+    from app.core.ephemeris import get_suntimes
+    assert get_suntimes(datetime(2024, 6, 21, 12), config) == get_suntimes(date(2024, 6, 21), config)
@@ -0,0 +1,85 @@
+"""Tests for sizing watering durations from the water balance."""
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+
+def get_config(plant_id, duration_sec, job_init=datetime(2024, 6, 1)):
+    return SimpleNamespace(plant_id=plant_id, duration_sec=duration_sec,
+                           job_init=job_init, job_due=job_init + timedelta(days=1))
+
+
+@pytest.fixture
+def weather(config, monkeypatch):
+    """Returns a function storing 24 hourly records of the given values from midnight on 1 June 2024."""
+    from app.water import evapotranspiration
+
+    def store(temperature, humidity, precipitation):
+        start = datetime(2024, 6, 1)
+        times = np.array([(start + timedelta(hours=hour)).timestamp() for hour in range(24)])
+        values = np.tile([temperature, humidity, precipitation], (24, 1)).astype("float64")
+        monkeypatch.setattr(evapotranspiration, "get_arrays", lambda start_date, end_date, names: (times.astype("int64"), values))
+    return store
+
+
+def test_get_durations_scales_by_deficit(config, weather):
+    from app.water.evapotranspiration import get_durations
+    config["WATER_ET_MAX_FACTOR"] = 2
+    weather(20, 50, 0.1)
+    # Evapotranspiration of 6.075mm less 80% of 2.4mm rainfall against a reference of 3mm.
+    durations = get_durations([get_config(1, 1000)], config)
+    assert durations[1] == pytest.approx(1385, abs=1)
+
+
+def test_get_durations_limits_factor(config, weather):
+    from app.water.evapotranspiration import get_durations
+    config["WATER_ET_MAX_FACTOR"] = 2
+    weather(20, 50, 0)
+    assert get_durations([get_config(1, 1000)], config) == {1: 2000}
+
+
+def test_get_durations_skips_when_rain_meets_deficit(config, weather):
+    from app.water.evapotranspiration import get_durations
+    weather(20, 50, 5)
+    assert get_durations([get_config(1, 1000)], config) == {1: 0}
+
+
+def test_get_durations_keeps_duration_without_weather(config, weather):
+    from app.water.evapotranspiration import get_durations
+    weather(20, 50, 0)
+    assert get_durations([get_config(1, 1000, datetime(2024, 7, 1))], config) == {1: 1000}
+    assert get_durations([], config) == {}
+
+
+@pytest.fixture
+def london():
+    """Sets the local time of this process to London."""
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/London"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_get_durations_compares_local_windows_with_utc_records(config, london, monkeypatch):
+    from app.water import evapotranspiration
+    requested = []
+
+    def get_arrays(start_date, end_date, names):
+        requested.append((start_date, end_date))
+        # Midnight in London during summer time is 23:00 UTC on the previous day.
+        times = datetime(2024, 5, 31, 23, tzinfo=timezone.utc).timestamp() + 3600 * np.arange(24)
+        values = np.tile([20, 50, 0.1], (24, 1)).astype("float64")
+        values[0, 2] = 10
+        return times.astype("int64"), values
+
+    monkeypatch.setattr(evapotranspiration, "get_arrays", get_arrays)
+    assert evapotranspiration.get_durations([get_config(1, 1000)], config) == {1: 0}
+    assert requested == [(date(2024, 5, 31), date(2024, 6, 1))]
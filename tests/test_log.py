@@ -0,0 +1,24 @@
+"""Tests for the per process log files."""
+from types import SimpleNamespace
+
+
+def test_log_file_is_named_by_role(tmp_path, monkeypatch):
+    from app.core.log import CompressedRotatingFileHandler
+    monkeypatch.setenv("LOG_ROLE", "web1")
+    handler = CompressedRotatingFileHandler(str(tmp_path / "logs" / "app.{role}.log"))
+    handler.close()
+    assert handler.baseFilename == str(tmp_path / "logs" / "app.web1.log")
+
+
+def test_replacement_workers_reuse_log_slots():
+    import gunicorn_config
+    server = SimpleNamespace(WORKERS={})
+    for pid in range(3):
+        worker = SimpleNamespace()
+        gunicorn_config.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    assert [worker.log_slot for worker in server.WORKERS.values()] == [0, 1, 2]
+    del server.WORKERS[1]
+    replacement = SimpleNamespace()
+    gunicorn_config.pre_fork(server, replacement)
+    assert replacement.log_slot == 1
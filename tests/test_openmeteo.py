@@ -0,0 +1,144 @@
+"""Tests for the Open-Meteo client against a local stub server."""
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import flatbuffers
+import numpy as np
+import pytest
+from app.core.openmeteo import Client, OpenMeteoError
+
+
+def build_response(values, start=0, interval=86400):
+    """Returns a length prefixed weather api response with one daily variable."""
+    builder = flatbuffers.Builder(256)
+    vector = builder.CreateNumpyVector(np.array(values, dtype="float32"))
+    builder.StartObject(4)
+    builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+    variable = builder.EndObject()
+    builder.StartVector(4, 1, 4)
+    builder.PrependUOffsetTRelative(variable)
+    variables = builder.EndVector()
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, start + interval * len(values), 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables, 0)
+    daily = builder.EndObject()
+    builder.StartObject(12)
+    builder.PrependUOffsetTRelativeSlot(10, daily, 0)
+    builder.Finish(builder.EndObject())
+    content = bytes(builder.Output())
+    return len(content).to_bytes(4, byteorder="little") + content
+
+
+class Stub(object):
+    """Local http server answering with the queued status codes, then the content."""
+
+    def __init__(self, content):
+        self.content = content
+        self.statuses = []
+        self.delay = 0
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                time.sleep(stub.delay)
+                body = stub.content if status == 200 else b"error"
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                return
+
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/forecast"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = Stub(build_response([1.5, 0, 2.25]))
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    return Client(cache_dir=str(tmp_path), ttl=60, timeout=2, retries=2, backoff=0.05, failure_threshold=2, cooldown=0.2)
+
+
+PARAMS = {"latitude": 51.48, "longitude": -3.18, "daily": "precipitation_sum"}
+
+
+def test_weather_api_parses_flatbuffers(stub, client):
+    response = client.weather_api(stub.url, PARAMS)[0]
+    assert response.Daily().Interval() == 86400
+    assert response.Daily().Variables(0).ValuesAsNumpy().tolist() == [1.5, 0, 2.25]
+
+
+def test_responses_are_cached_within_ttl(stub, client, tmp_path):
+    client.weather_api(stub.url, PARAMS)
+    client.weather_api(stub.url, dict(reversed(list(PARAMS.items()))))
+    assert stub.requests == 1
+    for name in os.listdir(tmp_path):
+        expired = time.time() - client.ttl - 1
+        os.utime(tmp_path / name, (expired, expired))
+    client.weather_api(stub.url, PARAMS)
+    assert stub.requests == 2
+
+
+def test_concurrent_requests_are_coalesced(stub, client):
+    stub.delay = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.weather_api(stub.url, PARAMS))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 5
+    assert stub.requests == 1
+
+
+def test_failed_requests_are_retried_with_backoff(stub, client):
+    stub.statuses = [503, 429]
+    start = time.monotonic()
+    response = client.weather_api(stub.url, PARAMS)[0]
+    # Backs off for 0.05 then 0.1 seconds before the third attempt.
+    assert time.monotonic() - start >= 0.15
+    assert stub.requests == 3
+    assert response.Daily().Variables(0).ValuesAsNumpy().tolist() == [1.5, 0, 2.25]
+
+
+def test_bad_requests_are_not_retried(stub, client):
+    stub.statuses = [400]
+    with pytest.raises(OpenMeteoError, match="Bad request"):
+        client.weather_api(stub.url, PARAMS)
+    assert stub.requests == 1
+
+
+def test_circuit_opens_and_closes(stub, client):
+    client.retries = 0
+    stub.statuses = [500, 500]
+    for _ in range(2):
+        with pytest.raises(OpenMeteoError, match="failed after"):
+            client.weather_api(stub.url, PARAMS)
+    with pytest.raises(OpenMeteoError, match="Circuit open"):
+        client.weather_api(stub.url, PARAMS)
+    assert stub.requests == 2
+    time.sleep(client.cooldown)
+    client.weather_api(stub.url, PARAMS)
+    assert stub.requests == 3
+    assert client.opened_at is None
+    assert client.failures == 0
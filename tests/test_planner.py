@@ -0,0 +1,105 @@
+"""Tests for planning runs against the flow capacity of each supply."""
+import pytest
+
+
+@pytest.fixture
+def supplies(config):
+    config["WATER_SYSTEM_SUPPLY"] = {"A": ("main", 1), "B": ("well", 1)}
+    config["WATER_SUPPLY_CAPACITY"] = {"main": 1, "well": 1}
+    return config
+
+
+def test_plan_orders_longest_first_and_interleaves_supplies(supplies):
+    from app.water.planner import plan
+    planned = plan([(1, "A", 30), (2, "A", 60), (3, "B", 10)], supplies)
+    assert planned == [(2, 60, "main", 1), (3, 10, "well", 1), (1, 30, "main", 1)]
+
+
+def test_plan_uses_default_supply(supplies):
+    from app.water.planner import plan
+    assert plan([(1, "Unknown", 30)], supplies) == [(1, 30, supplies["WATER_DEFAULT_SUPPLY"], 1)]
+
+
+def test_simulate_runs_supplies_together(supplies):
+    from app.water.planner import plan, simulate
+    planned = plan([(1, "A", 30), (2, "A", 60), (3, "B", 10)], supplies)
+    assert simulate(planned, supplies, 4) == (90, {"main": 1, "well": 1})
+
+
+def test_simulate_counts_restarts_within_limit(supplies):
+    from app.water.planner import plan, simulate
+    planned = plan([(1, "A", 30), (2, "A", 60), (3, "B", 10)], supplies)
+    assert simulate(planned, supplies, 1) == (100, {"main": 2, "well": 1})
+
+
+
+def get_baseline(runs, wait_sec):
+    """Models watering without the planner, each run starts the pump and waits for its valve one after another."""
+    return sum(duration_sec + 2 * wait_sec for _, _, duration_sec in runs), len(runs)
+
+
+def test_plan_improves_on_sequential_baseline(supplies):
+    from app.water.planner import plan, simulate
+    supplies["WATER_SUPPLY_CAPACITY"] = {"main": 2, "well": 1}
+    wait_sec = 2
+    runs = [(plant_id, "A" if plant_id < 6 else "B", 60 + 30 * (plant_id % 3)) for plant_id in range(9)]
+    baseline_window, baseline_starts = get_baseline(runs, wait_sec)
+    # Valve waits are still paid by every run with the pump held on.
+    planned = plan([(plant_id, name, duration_sec + 2 * wait_sec) for plant_id, name, duration_sec in runs], supplies)
+    window_sec, starts = simulate(planned, supplies, 4)
+    assert (baseline_window, baseline_starts) == (846, 9)
+    assert (window_sec, starts) == (282, {"main": 1, "well": 1})
+    assert window_sec < baseline_window
+    assert sum(starts.values()) < baseline_starts
+
+def test_fits_allows_oversized_runs_on_idle_supply():
+    from app.water.planner import fits
+    assert fits(0, 2, 1)
+    assert fits(0.5, 0.5, 1)
+    assert not fits(1, 1, 1)
+
+
+def test_next_run_skips_full_supplies(supplies):
+    from app.water.dispatcher import Dispatcher
+    dispatcher = Dispatcher(4, supplies)
+    dispatcher.pending = [(1, 10, "main", 1), (2, 10, "main", 1), (3, 10, "well", 1)]
+    assert dispatcher.next_run() == (1, 10, "main", 1)
+    assert dispatcher.next_run() == (3, 10, "well", 1)
+    assert dispatcher.next_run() is None
+    assert dispatcher.has_pending("main")
+    assert not dispatcher.has_pending("well")
+    dispatcher.release("main", 1, drain=False)
+    assert dispatcher.next_run() == (2, 10, "main", 1)
+
+
+@pytest.fixture
+def pump(monkeypatch):
+    from app.water.gpio import GPIO, SimulatedGPIO
+    from app.water.pump import Pump
+    monkeypatch.setattr(GPIO, "impl", SimulatedGPIO(relay_delay_sec=0))
+    monkeypatch.setattr(Pump, "relays", {})
+    pump = Pump(16, hold_sec=60, supply="main")
+    yield pump
+    timer = Pump.relays[16]["timer"]
+    if timer is not None:
+        timer.cancel()
+
+
+def test_pump_holds_when_zone_is_queued(pump, monkeypatch):
+    from app.water.pump import Pump
+    monkeypatch.setattr(Pump, "queued", lambda supply: supply == "main")
+    pump.on()
+    pump.off()
+    assert Pump.relays[16]["timer"] is not None
+    pump.on()
+    assert pump.starts == 1
+
+
+def test_pump_switches_off_when_nothing_is_queued(pump, monkeypatch):
+    from app.water.pump import Pump
+    monkeypatch.setattr(Pump, "queued", lambda supply: False)
+    pump.on()
+    pump.off()
+    assert Pump.relays[16]["timer"] is None
+    pump.on()
+    assert pump.starts == 2
@@ -0,0 +1,52 @@
+"""Tests for checking rain reset thresholds against the weather store."""
+from datetime import date, datetime, time
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+
+
+def store(day, precipitation):
+    from app.weather.jobs import insert_into_db
+    daily = pd.DataFrame({"date": [day], "sunrise": [time(6)], "sunset": [time(20)],
+                          "weather_code": [61], "weather_description": ["Rain"]})
+    hourly = pd.DataFrame({"date": [day] * 24, "time": [time(hour) for hour in range(24)],
+                           "temperature": 10, "humidity": 90, "precipitation_probability": 80,
+                           "precipitation": precipitation / 24})
+    insert_into_db(daily, hourly)
+
+
+def get_config(plant_id, job_init, job_due, threshold_mm):
+    return SimpleNamespace(plant_id=plant_id, job_init=job_init, job_due=job_due, threshold_mm=threshold_mm)
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """Records the dates requested from Open-Meteo, each returns 1mm of rain."""
+    from app.water import jobs
+    requested = []
+
+    def get_rain_sums(dates):
+        requested.append(dates)
+        return {day: 1.0 for day in dates}
+
+    monkeypatch.setattr(jobs, "get_rain_sums", get_rain_sums)
+    return requested
+
+
+def test_check_rain_skips_request_when_stored_rain_meets_threshold(app, requests):
+    from app.water.jobs import check_rain
+    store(date(2024, 6, 1), 12)
+    configs = [get_config(1, datetime(2024, 6, 1, 6), datetime(2024, 6, 3, 6), 10)]
+    assert check_rain(configs) == {1}
+    assert requests == []
+
+
+def test_check_rain_requests_missing_dates_for_unmet_plants(app, requests):
+    from app.water.jobs import check_rain
+    store(date(2024, 6, 1), 3)
+    store(date(2024, 6, 2), 1.5)
+    configs = [get_config(1, datetime(2024, 6, 1, 6), datetime(2024, 6, 3, 6), 5.5),
+               get_config(2, datetime(2024, 6, 1, 6), datetime(2024, 6, 2, 6), 1),
+               get_config(3, datetime(2024, 6, 2, 6), datetime(2024, 6, 4, 6), 10)]
+    assert check_rain(configs) == {1, 2}
+    assert requests == [[date(2024, 6, 3), date(2024, 6, 4)]]
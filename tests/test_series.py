@@ -0,0 +1,34 @@
+"""Tests for columnar weather series."""
+from datetime import date, datetime, timezone
+from app.weather.models import Daily, Hourly
+from app.weather.series import get_series
+from app import db
+
+
+def store(days):
+    from datetime import time
+    for day in days:
+        daily = Daily(date=day)
+        daily.hourly = [Hourly(time=time(hour), temperature=hour, humidity=50,
+                               precipitation_probability=None, precipitation=0.5) for hour in range(24)]
+        db.session.add(daily)
+    db.session.commit()
+
+
+def test_get_series_delta_encodes_times(app):
+    store([date(2024, 6, 1), date(2024, 6, 2)])
+    series = get_series(date(2024, 6, 1), date(2024, 6, 2), 1000)
+    assert series["downsampled"] is False
+    assert series["time"][0] == datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp()
+    assert series["time"][1:] == [3600] * 47
+    assert series["series"]["temperature"] == list(range(24)) * 2
+    assert series["series"]["precipitation_probability"] == [0] * 48
+
+
+def test_get_series_downsamples_to_buckets(app):
+    store([date(2024, 6, 1), date(2024, 6, 2)])
+    series = get_series(date(2024, 6, 1), date(2024, 6, 2), 8)
+    assert series["downsampled"] is True
+    assert sum(series["time"][1:]) == 36 * 3600
+    assert series["series"]["temperature"]["min"] == [0, 12, 0, 12]
+    assert series["series"]["temperature"]["max"] == [11, 23, 11, 23]
@@ -0,0 +1,74 @@
+"""Tests for upgrading existing databases on startup."""
+from datetime import date, time
+import pytest
+
+
+def get_indexes(bind_key, table):
+    from app import db
+    return {index["name"]: index for index in db.inspect(db.engines[bind_key]).get_indexes(table)}
+
+
+def test_init_indexes_creates_missing_indexes(app):
+    from app.core.setup import init_indexes
+    from app import db
+    with db.engines["weather"].begin() as connection:
+        connection.execute(db.text("DROP INDEX ix_hourly_daily_id_time"))
+    init_indexes()
+    assert get_indexes("weather", "hourly")["ix_hourly_daily_id_time"]["unique"]
+
+
+def test_hourly_index_rejects_duplicates(app):
+    from sqlalchemy.exc import IntegrityError
+    from app.weather.models import Daily, Hourly
+    from app import db
+    daily = Daily(date=date(2024, 6, 1))
+    daily.hourly = [Hourly(time=time(0)), Hourly(time=time(0))]
+    db.session.add(daily)
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_remove_duplicate_hours_upgrades_index(app):
+    from app.core.setup import init_indexes
+    from app.weather.setup import remove_duplicate_hours
+    from app.weather.models import Daily, Hourly
+    from app import db
+    with db.engines["weather"].begin() as connection:
+        connection.execute(db.text("DROP INDEX ix_hourly_daily_id_time"))
+        connection.execute(db.text("CREATE INDEX ix_hourly_daily_id_time ON hourly (daily_id, time)"))
+    daily = Daily(date=date(2024, 6, 1))
+    daily.hourly = [Hourly(time=time(0), temperature=10), Hourly(time=time(0), temperature=15), Hourly(time=time(1))]
+    db.session.add(daily)
+    db.session.commit()
+    remove_duplicate_hours()
+    assert "ix_hourly_daily_id_time" not in get_indexes("weather", "hourly")
+    assert db.session.execute(db.select(Hourly.time, Hourly.temperature).order_by(Hourly.time)).all() == [(time(0), 10), (time(1), None)]
+    init_indexes()
+    assert get_indexes("weather", "hourly")["ix_hourly_daily_id_time"]["unique"]
+
+
+def explain(bind_key, statement):
+    """Returns the query plan details of the statement as a single string."""
+    from app import db
+    sql = str(statement.compile(db.engines[bind_key], compile_kwargs={"literal_binds": True}))
+    with db.engines[bind_key].connect() as connection:
+        return " | ".join(row[-1] for row in connection.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_query_plans_use_indexes(app):
+    from datetime import datetime
+    from app.weather.models import Daily, Hourly
+    from app.water.models import Plant, History, Config
+    from app import db
+    plans = {
+        "ix_daily_date": explain("weather", db.select(Daily.id).where(Daily.date == date(2024, 6, 1))),
+        "ix_hourly_daily_id_time": explain("weather", db.select(Hourly).where(Hourly.daily_id == 1).order_by(Hourly.time)),
+        "ix_history_plant_id": explain("water", db.select(History).where(History.plant_id == 1)),
+        "ix_plant_system_id": explain("water", db.select(Plant).where(Plant.system_id == 1)),
+        "ix_config_plant_id": explain("water", db.select(Config).where(Config.plant_id == 1)),
+        "ix_config_job_due": explain("water", db.select(Config).where(Config.job_due <= datetime(2024, 6, 1)))
+    }
+    for index, plan in plans.items():
+        assert index in plan, plan
+        assert "SCAN" not in plan and "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,32 @@
+"""Tests for caches cleared by stamp files."""
+from app.core.stamp import StampCache, get_stamp
+
+
+def test_touch_clears_other_caches(tmp_path):
+    path = str(tmp_path / "cache.stamp")
+    cache, other = StampCache(), StampCache()
+    generation = other.check(get_stamp(path))
+    assert other.get_or_load(generation, "key", lambda: 1) == 1
+    assert other.get_or_load(generation, "key", lambda: 2) == 1
+    cache.touch(path)
+    generation = other.check(get_stamp(path))
+    assert other.get_or_load(generation, "key", lambda: 2) == 2
+
+
+def test_values_loaded_while_clearing_are_not_stored():
+    cache = StampCache()
+    generation = cache.check(None)
+
+    def load():
+        cache.clear()
+        return 1
+
+    assert cache.get_or_load(generation, "key", load) == 1
+    assert cache.values == {}
+
+
+def test_invalid_values_are_loaded_again():
+    cache = StampCache()
+    generation = cache.check(None)
+    cache.get_or_load(generation, "key", lambda: 1)
+    assert cache.get_or_load(generation, "key", lambda: 2, lambda value: value > 1) == 2
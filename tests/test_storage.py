@@ -0,0 +1,26 @@
+"""Tests for the connection settings applied to SQLite databases."""
+import sqlite3
+
+
+def test_pragma_listener_sets_pragmas(tmp_path):
+    from app.core.storage import get_pragma_listener
+    connection = sqlite3.connect(tmp_path / "test.db")
+    get_pragma_listener({"journal_mode": "WAL", "busy_timeout": 5000, "cache_size": -2000})(connection, None)
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert connection.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+    assert connection.execute("PRAGMA cache_size").fetchone() == (-2000,)
+    connection.close()
+
+
+def test_init_storage_applies_bind_overrides(app):
+    from app.core.storage import init_storage
+    from app import db
+    app.config["SQLITE_BIND_PRAGMAS"] = {"users": {"cache_size": -1000}}
+    init_storage(app)
+    for bind_key, engine in db.engines.items():
+        engine.dispose()
+        with engine.connect() as connection:
+            cache_size = connection.execute(db.text("PRAGMA cache_size")).scalar()
+            journal_mode = connection.execute(db.text("PRAGMA journal_mode")).scalar()
+        assert cache_size == (-1000 if bind_key == "users" else app.config["SQLITE_PRAGMAS"]["cache_size"])
+        assert journal_mode == "wal"
@@ -0,0 +1,69 @@
+"""Tests for the watering usage rollups."""
+import time
+import threading
+from datetime import date, datetime, timedelta
+from app.water.models import History, Usage
+from app.water.usage import record_usage, get_usage, rebuild_usage
+from app import db
+from tests.conftest import add_plant
+
+
+def get_rollups():
+    return sorted(tuple(row) for row in db.session.execute(db.select(Usage.plant_id, Usage.period, Usage.start,
+                                                                         Usage.count, Usage.duration_sec)))
+
+
+def test_record_usage_accumulates_periods(app):
+    plant_id = add_plant("Fern", "Test")
+    record_usage(plant_id, datetime(2024, 6, 5, 6), 60)
+    record_usage(plant_id, datetime(2024, 6, 5, 18), 30)
+    record_usage(plant_id, datetime(2024, 6, 7, 6), 45)
+    assert get_usage(plant_id, "day") == [(date(2024, 6, 5), 2, 90), (date(2024, 6, 7), 1, 45)]
+    assert get_usage(plant_id, "week") == [(date(2024, 6, 3), 3, 135)]
+    assert get_usage(plant_id, "month") == [(date(2024, 6, 1), 3, 135)]
+
+
+def test_get_usage_filters_by_start(app):
+    plant_id = add_plant("Fern", "Test")
+    for day in range(1, 6):
+        record_usage(plant_id, datetime(2024, 6, day, 6), 10)
+    assert [row.start for row in get_usage(plant_id, "day", date(2024, 6, 2), date(2024, 6, 4))] == \
+        [date(2024, 6, 2), date(2024, 6, 3), date(2024, 6, 4)]
+
+
+def test_rebuild_usage_matches_recorded_usage(app, tmp_path):
+    from app.water.archive import archive_history
+    plant_id = add_plant("Fern", "Test")
+    deleted_id = add_plant("Rose", "Other")
+    now = datetime.now().replace(microsecond=0)
+    for days in (200, 120, 30, 1, 0):
+        start_date_time = now - timedelta(days=days)
+        db.session.add(History(plant_id=plant_id, start_date_time=start_date_time, duration_sec=days + 10))
+        record_usage(plant_id, start_date_time, days + 10)
+    db.session.add(History(plant_id=deleted_id, start_date_time=now, duration_sec=5))
+    db.session.commit()
+    db.session.execute(db.delete(Usage).where(Usage.plant_id == deleted_id))
+    db.session.commit()
+    db.session.execute(db.text("DELETE FROM plant WHERE id = :id"), {"id": deleted_id}, bind_arguments={"bind": db.engines["water"]})
+    db.session.commit()
+    assert archive_history(str(tmp_path), 90) == 2
+    recorded = get_rollups()
+    rebuild_usage(str(tmp_path))
+    assert get_rollups() == recorded
+
+
+def test_process_records_elapsed_seconds(app, ready, monkeypatch):
+    from app.water.actuator import Actuator
+    from app.water.jobs import process
+    from app import actuators
+    from tests.test_actuator import Recorder
+    actuator = Actuator("Test", Recorder())
+    monkeypatch.setitem(actuators, "Test", actuator)
+    plant_id = add_plant("Fern", "Test")
+    done = threading.Event()
+    assert process(60, plant_id, callback=done.set)
+    time.sleep(1.1)
+    actuator.cancel()
+    assert done.wait(5)
+    assert db.session.scalars(db.select(History.duration_sec)).all() == [1]
+    assert [row.duration_sec for row in get_usage(plant_id, "day")] == [1]
@@ -0,0 +1,41 @@
+"""Tests for debounced valve movements on the simulated GPIO backend."""
+import time
+import pytest
+from app.water.gpio import GPIO, SimulatedGPIO
+from app.water.valve import Valve
+
+
+@pytest.fixture
+def gpio(monkeypatch):
+    gpio = SimulatedGPIO(relay_delay_sec=0.01, bounce_pattern="000010101101111",
+                         bounce_interval_sec=0.005, wiring={18: 12})
+    monkeypatch.setattr(GPIO, "impl", gpio)
+    yield gpio
+    gpio.cleanup()
+
+
+def test_move_records_bounces_and_settle_time(gpio):
+    valve = Valve(18, 12, settle_sec=0.05, timeout_sec=2)
+    for move in (valve.off, valve.on, valve.off):
+        move()
+        # Relay delay of 0.01, last transition 0.06 later, then settled for 0.05 seconds.
+        assert valve.bounces == 3
+        assert valve.settle_time == pytest.approx(0.12, abs=0.03)
+
+
+def test_move_switches_relay_off(gpio):
+    valve = Valve(18, 12, settle_sec=0.05, timeout_sec=2)
+    valve.off()
+    time.sleep(gpio.relay_delay_sec * 3)
+    assert gpio.input(18) == 0
+
+
+def test_move_times_out_when_switch_is_stuck(gpio):
+    gpio.wiring = {}
+    valve = Valve(18, 12, settle_sec=0.05, timeout_sec=0.2)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        valve.on()
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.05)
+    time.sleep(gpio.relay_delay_sec * 3)
+    assert gpio.input(18) == 0
@@ -0,0 +1,69 @@
+"""Tests for transforming and upserting weather responses."""
+from datetime import date, time
+import pandas as pd
+
+
+def get_dataframes(day, temperature):
+    daily = pd.DataFrame({"date": [day],
+                          "sunrise": [time(6)],
+                          "sunset": [time(20)],
+                          "weather_code": [0],
+                          "weather_description": ["Clear sky"]})
+    hourly = pd.DataFrame({"date": [day] * 24,
+                           "time": [time(hour) for hour in range(24)],
+                           "temperature": [temperature] * 24,
+                           "humidity": [50] * 24,
+                           "precipitation_probability": [0] * 24,
+                           "precipitation": [0.0] * 24})
+    return daily, hourly
+
+
+def test_insert_into_db_updates_existing_rows(app):
+    from app.weather.jobs import insert_into_db
+    from app.weather.models import Daily, Hourly
+    from app import db
+    assert insert_into_db(*get_dataframes(date(2024, 6, 1), 10)) == (1, 24)
+    assert insert_into_db(*get_dataframes(date(2024, 6, 1), 15)) == (0, 0)
+    assert db.session.scalar(db.select(db.func.count(Daily.id))) == 1
+    assert db.session.scalar(db.select(db.func.count(Hourly.id))) == 24
+    assert set(db.session.scalars(db.select(Hourly.temperature))) == {15}
+
+
+def test_insert_into_db_counts_added_rows(app):
+    from app.weather.jobs import insert_into_db
+    daily, hourly = get_dataframes(date(2024, 6, 1), 10)
+    assert insert_into_db(daily, hourly.iloc[:12]) == (1, 12)
+    next_daily, next_hourly = get_dataframes(date(2024, 6, 2), 10)
+    assert insert_into_db(pd.concat([daily, next_daily]), pd.concat([hourly, next_hourly])) == (1, 36)
+
+
+def test_insert_into_db_ignores_empty_responses(app):
+    from app.weather.jobs import insert_into_db
+    daily, hourly = get_dataframes(date(2024, 6, 1), 10)
+    assert insert_into_db(daily.iloc[0:0], hourly.iloc[0:0]) == (0, 0)
+
+
+def test_load_wmo_descriptions_fills_missing_codes():
+    from app.weather.jobs import load_wmo_descriptions
+    descriptions = load_wmo_descriptions()
+    assert descriptions[0] == "Clear Sky"
+    assert descriptions[45] == "Fog"
+    assert descriptions[4] == "Unknown"
+
+
+def test_insert_descriptions_maps_codes(app):
+    from app.weather.jobs import insert_descriptions
+    daily = pd.DataFrame({"weather_code": [0, 3, 45, 4, 1000, -1]})
+    descriptions = insert_descriptions(daily)["weather_description"].tolist()
+    assert descriptions == ["Clear Sky", "Overcast", "Fog", "Unknown", "Unknown", "Unknown"]
+
+
+def test_delete_anomalies_removes_incomplete_dates():
+    from app.weather.jobs import delete_anomalies
+    daily, hourly = get_dataframes(date(2024, 6, 1), 10)
+    partial_daily, _ = get_dataframes(date(2024, 6, 2), 10)
+    daily = pd.concat([daily, partial_daily], ignore_index=True)
+    hourly = pd.concat([hourly, pd.DataFrame({"date": [date(2024, 6, 2)], "time": [time(0)]})], ignore_index=True)
+    daily, hourly = delete_anomalies(daily, hourly)
+    assert daily["date"].tolist() == [date(2024, 6, 1)]
+    assert set(hourly["date"]) == {date(2024, 6, 1)}